@@ -0,0 +1,420 @@
+import asyncio
+import contextvars
+import io
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, request, jsonify, make_response
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.exceptions import HTTPException
+
+from app import cache, db_pool, listings, media, metrics, replicas
+from app.pagination import InvalidCursor, parse_limit, wants_stream, keyset_query, split_page
+from app.realtime import get_broker
+from app.realtime_server import sse_events
+from models.model_product import Product
+from models.model_category import Category
+from models.model_client import Client
+from models.model_ticket import SupportTicket
+from models.model_message import Message
+from models.model_conversation import ConversationSummary
+from models.all_schemas import (
+    products_schema, categories_schema, clients_schema, support_tickets_schema,
+    messages_schema, conversation_summaries_schema,
+)
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+_ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+psycopg', 'postgresql+psycopg2': 'postgresql+psycopg',
+    'postgresql+psycopg': 'postgresql+psycopg', 'postgresql+asyncpg': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite', 'sqlite+pysqlite': 'sqlite+aiosqlite', 'sqlite+aiosqlite': 'sqlite+aiosqlite',
+}
+
+
+# URL async equivalente a la principal. Con SQLite en memoria ('sqlite://')
+# cada conexión ve otra base vacía: para el modo ASGI hace falta un fichero.
+def async_database_url(config):
+    if config.get('ASYNC_DATABASE_URL'):
+        return config['ASYNC_DATABASE_URL']
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.drivername not in _ASYNC_DRIVERS:
+        raise ValueError(f"Sin driver async para {url.drivername}: define ASYNC_DATABASE_URL")
+    return url.set(drivername=_ASYNC_DRIVERS[url.drivername])
+
+
+# Entorno WSGI a partir del scope ASGI; `body` es el fichero con el cuerpo
+def _environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f"HTTP_{name}"
+        value = value.decode('latin-1')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _header_list(headers):
+    return [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+
+def _chunk(data):
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+# Envía un cuerpo async (SSE, ficheros) hasta que se agota o el cliente se va
+async def _stream(send, receive, body):
+    async def pump():
+        async for data in body:
+            await send({'type': 'http.response.body', 'body': _chunk(data), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(_wait_disconnect(receive))]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Cancelar pump cierra el generador en su punto de espera (p. ej. se desuscribe del broker)
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        await body.aclose()
+    if isinstance(results[0], Exception):
+        raise results[0]
+
+
+async def _read_file(path):
+    source = await asyncio.to_thread(open, path, 'rb')
+    try:
+        while True:
+            data = await asyncio.to_thread(source.read, FILE_CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+    finally:
+        source.close()
+
+
+async def _scalars(session, stmt):
+    return (await session.scalars(stmt)).all()
+
+
+# ---------------------------------------------------------------------------
+# Vistas async. Sirven la misma URL que la ruta Flask del endpoint con las
+# mismas consultas (app/listings.py) y se ejecutan dentro de su contexto de
+# petición. Devolver None delega la petición en la vista Flask.
+# ---------------------------------------------------------------------------
+
+async def _list(session, stmt, schema, created_col, id_col):
+    if wants_stream():
+        return None  # NDJSON: cursor del servidor por lotes en app/pagination.py
+    cursor = request.args.get('cursor')
+    try:
+        if cursor is None and 'limit' not in request.args:
+            rows = await _scalars(session, stmt.order_by(created_col.desc(), id_col.desc()))
+            return schema.jsonify(rows)
+        limit = parse_limit(request.args.get('limit'))
+        rows = await _scalars(session, keyset_query(stmt, created_col, id_col, cursor).limit(limit + 1))
+    except InvalidCursor:
+        return make_response(jsonify({"message": "Cursor inválido"}), 400)
+    rows, next_cursor = split_page(rows, created_col, id_col, limit)
+    return jsonify({"items": schema.dump(rows), "next_cursor": next_cursor, "limit": limit})
+
+
+# Caché de catálogo (app/cache.py) con la misma clave que la ruta Flask; un
+# backend remoto se consulta desde un hilo para no bloquear el loop.
+def _cached(view):
+    async def wrapper(session, **kwargs):
+        if not cache.catalog_cacheable():
+            return await view(session, **kwargs)
+        local = cache.is_local()
+        key, body = cache.lookup() if local else await asyncio.to_thread(cache.lookup)
+        if body is not None:
+            return cache.hit_response(body)
+        response = await view(session, **kwargs)
+        if response is None:
+            return None
+        return cache.store(key, response) if local else await asyncio.to_thread(cache.store, key, response)
+    return wrapper
+
+
+@_cached
+async def get_products(session):
+    stmt = listings.products(request.args.get('company_id'), request.args.get('category_id'))
+    return await _list(session, stmt, products_schema, Product.created_at, Product.id_product)
+
+
+@_cached
+async def get_categories(session):
+    stmt = listings.categories(request.args.get('company_id'), request.args.get('typeon'))
+    return await _list(session, stmt, categories_schema, Category.created_at, Category.id_category)
+
+
+async def get_clients(session):
+    company_id = request.args.get('company_id')
+    if not company_id:
+        return make_response({"msg": "Falta el parámetro company_id"}, 400)
+    return await _list(session, listings.clients(company_id), clients_schema, Client.created_at, Client.id)
+
+
+async def get_tickets(session):
+    return await _list(session, listings.tickets(), support_tickets_schema,
+                       SupportTicket.created_at, SupportTicket.id)
+
+
+async def get_inbox(session):
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return make_response(jsonify({'message': 'Parámetro user_id es requerido'}), 400)
+    return await _list(session, listings.inbox(user_id), conversation_summaries_schema,
+                       ConversationSummary.last_message_at, ConversationSummary.id)
+
+
+async def get_conversation(session, user_id):
+    other_user_id = request.args.get('other_user_id')
+    if not other_user_id:
+        return make_response(jsonify({'message': 'Parámetro other_user_id es requerido'}), 400)
+
+    anchor = None
+    anchor_id = request.args.get('after_id') or request.args.get('before_id')
+    if anchor_id:
+        anchor = await session.get(Message, anchor_id)
+        if not anchor:
+            return make_response(jsonify({'message': 'Mensaje de referencia no encontrado'}), 404)
+
+    try:
+        stmt, newest_first = listings.conversation_window(
+            listings.conversation(user_id, other_user_id), request.args, anchor)
+    except ValueError:
+        return make_response(jsonify({'message': 'Parámetro since inválido'}), 400)
+
+    messages = await _scalars(session, stmt)
+    if newest_first:
+        messages.reverse()
+    return messages_schema.jsonify(messages)
+
+
+# SSE: una corrutina por conexión en lugar de un hilo bloqueado
+async def stream_messages(session, user_id):
+    events = sse_events(get_broker(), user_id, current_app.config['REALTIME_KEEPALIVE'])
+    return current_app.response_class(events, mimetype='text/event-stream',
+                                      headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# Imágenes direccionadas por contenido leídas por bloques sin ocupar hilos.
+# Range, X-Sendfile/X-Accel-Redirect y los nombres antiguos (ETag calculado
+# por send_file) siguen en la vista Flask.
+async def uploaded_file(session, filename):
+    if 'Range' in request.headers or current_app.config.get('USE_X_SENDFILE') \
+            or current_app.config.get('MEDIA_ACCEL_REDIRECT_PREFIX'):
+        return None
+    size = request.args.get('size', type=int)
+    filename, path, pending = await asyncio.to_thread(media.resolve_media, filename, size, media.wants_webp())
+    if path is None:
+        return None
+    mimetype, etag, max_age, immutable = media.cache_policy(filename, pending)
+    if not isinstance(etag, str):
+        return None
+
+    response = current_app.response_class(_read_file(path), mimetype=mimetype)
+    response.content_length = os.path.getsize(path)
+    response.set_etag(etag)
+    response.cache_control.max_age = max_age
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    if size:
+        response.vary.add('Accept')
+    return response.make_conditional(request)
+
+
+ASYNC_VIEWS = {
+    'product.get_products': get_products,
+    'category.get_categories': get_categories,
+    'client.get_clients': get_clients,
+    'ticket.get_tickets': get_tickets,
+    'message.get_inbox': get_inbox,
+    'message.get_conversation': get_conversation,
+    'message.stream_messages': stream_messages,
+    'user.uploaded_file': uploaded_file,
+}
+
+
+# Aplicación ASGI sobre la app Flask. Las vistas de ASYNC_VIEWS (mensajes,
+# listados, SSE e imágenes) se atienden en el loop con sesiones async de
+# SQLAlchemy, así una petición esperando a Postgres o a un cliente lento no
+# ocupa un hilo. El resto de rutas es la app Flask tal cual, ejecutada en un
+# pool de ASGI_WSGI_THREADS hilos con el cuerpo volcado a un fichero temporal.
+#
+#   uvicorn asgi:application --workers 4
+class AsgiApp:
+    def __init__(self, app, views=None):
+        self.app = app
+        self.views = ASYNC_VIEWS if views is None else views
+        self._engine = None
+        self._sessions = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    # Engine y pool de hilos se crean en el primer uso, ya dentro del worker
+    def _ensure_started(self):
+        if self._executor is not None:
+            return
+        with self._lock:
+            if self._executor is not None:
+                return
+            config = self.app.config
+            if config['ASYNC_VIEWS_ENABLED']:
+                url = async_database_url(config)
+                # Mismo pool que el engine síncrono: suma conexiones (ver _engine_options)
+                options = config.get('SQLALCHEMY_ENGINE_OPTIONS') if make_url(url).drivername.startswith('postgresql') else {}
+                self._engine = create_async_engine(url, **(options or {}))
+                self._sessions = async_sessionmaker(self._engine, expire_on_commit=False)
+                db_pool.instrument_engine('async', self._engine.sync_engine, self.app)
+                metrics.instrument_engine(self._engine.sync_engine)
+            self._executor = ThreadPoolExecutor(config['ASGI_WSGI_THREADS'], thread_name_prefix='asgi-wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        self._ensure_started()
+        environ = _environ(scope, io.BytesIO())
+        view, view_args = self._match(environ)
+        if view is not None:
+            await self._call_async(view, view_args, environ, receive, send)
+        else:
+            await self._call_wsgi(environ, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._ensure_started()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._engine is not None:
+                    await self._engine.dispose()
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _match(self, environ):
+        if self._sessions is None or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return None, None
+        try:
+            endpoint, view_args = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return None, None
+        return self.views.get(endpoint), view_args
+
+    async def _call_async(self, view, view_args, environ, receive, send):
+        # Las vistas async leen del primario con self._engine: sin réplica elegida
+        with self.app.request_context({**environ, replicas.PRIMARY_ONLY_ENVIRON: True}):
+            try:
+                # before_request de la app como en la ruta Flask, en el pool de hilos
+                # porque pueden bloquear. Si la vista delega (None), la petición WSGI
+                # los vuelve a ejecutar en su propio contexto.
+                response = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, contextvars.copy_context().run, self.app.preprocess_request)
+                if response is not None:
+                    response = self.app.make_response(response)
+                else:
+                    async with self._sessions() as session:
+                        response = await view(session, **view_args)
+                if response is not None:
+                    response = self.app.process_response(response)
+            except Exception:
+                self.app.log_exception(sys.exc_info())
+                response = make_response(jsonify({'message': 'Error interno del servidor'}), 500)
+            if response is not None:
+                return await self._send_response(response, environ, receive, send)
+        await self._call_wsgi(dict(environ), receive, send)
+
+    async def _send_response(self, response, environ, receive, send):
+        headers = response.get_wsgi_headers(environ)
+        await send({'type': 'http.response.start', 'status': response.status_code,
+                    'headers': _header_list(headers.to_wsgi_list())})
+        body = response.response
+        streamed = hasattr(body, '__aiter__')
+        if environ['REQUEST_METHOD'] == 'HEAD' or response.status_code in (204, 304):
+            if streamed:
+                await body.aclose()
+            await send({'type': 'http.response.body', 'body': b''})
+        elif streamed:
+            await _stream(send, receive, body)
+        else:
+            await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    # Puente a la app WSGI: el cuerpo se lee sin bloquear (hasta
+    # ASGI_SPOOL_MAX_BYTES en memoria, el resto en disco) y la vista y cada
+    # bloque de su respuesta se ejecutan en el pool de hilos, siempre en el
+    # mismo contextvars.Context para que stream_with_context funcione.
+    async def _call_wsgi(self, environ, receive, send):
+        body = tempfile.SpooledTemporaryFile(max_size=self.app.config['ASGI_SPOOL_MAX_BYTES'])
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return
+            body.write(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body.seek(0)
+        environ['wsgi.input'] = body
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.Context()
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+
+        def first_chunk():
+            iterable = self.app(environ, start_response)
+            iterator = iter(iterable)
+            return iterable, iterator, next(iterator, None)
+
+        try:
+            iterable, iterator, data = await loop.run_in_executor(self._executor, context.run, first_chunk)
+            try:
+                await send({'type': 'http.response.start', 'status': started['status'],
+                            'headers': _header_list(started['headers'])})
+                while data is not None:
+                    await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+                    data = await loop.run_in_executor(self._executor, context.run, next, iterator, None)
+                await send({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(iterable, 'close'):
+                    await loop.run_in_executor(self._executor, context.run, iterable.close)
+        finally:
+            body.close()
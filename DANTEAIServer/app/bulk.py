@@ -0,0 +1,290 @@
+import csv
+import io
+import json
+import uuid
+
+from flask import current_app, request, Response, stream_with_context
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.signals import notify_change
+from app.pagination import stream_session
+from models.model_category import Category
+from models.model_product import Product
+from models.model_client import Client
+
+FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 1000
+
+
+class RowError(ValueError):
+    pass
+
+
+def request_format(default='csv'):
+    fmt = (request.args.get('format') or '').lower()
+    if fmt in FORMATS:
+        return fmt
+    mimetype = request.mimetype if request.method == 'POST' else request.accept_mimetypes.best
+    if mimetype in ('application/x-ndjson', 'application/ndjson'):
+        return 'ndjson'
+    if mimetype == 'text/csv':
+        return 'csv'
+    return default
+
+
+# (número de línea, registro) leyendo el cuerpo según llega
+def iter_records(stream, fmt):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+        return
+    for line_num, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_num, RowError("JSON inválido")
+            continue
+        yield line_num, record if isinstance(record, dict) else RowError("Se esperaba un objeto JSON")
+
+
+# -------------------- validación --------------------
+
+def _blank(value):
+    return value is None or value == ''
+
+
+def _string(record, key, max_length, required=False):
+    value = record.get(key)
+    if _blank(value):
+        if required:
+            raise RowError(f"{key} es obligatorio")
+        return None
+    value = str(value)
+    if len(value) > max_length:
+        raise RowError(f"{key} supera {max_length} caracteres")
+    return value
+
+
+def _number(record, key, cast, required=False, minimum=None):
+    value = record.get(key)
+    if _blank(value):
+        if required:
+            raise RowError(f"{key} es obligatorio")
+        return None
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{key} no es un número válido")
+    if minimum is not None and value < minimum:
+        raise RowError(f"{key} no puede ser menor que {minimum}")
+    return value
+
+
+def _boolean(record, key, default=True):
+    value = record.get(key)
+    if _blank(value):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('true', '1', 'si', 'sí', 'yes')
+
+
+def _category(record, categories):
+    ref = record.get('category_id') or record.get('category')
+    if _blank(ref):
+        raise RowError("category_id o category es obligatorio")
+    category_id = categories.get(str(ref)) or categories.get(str(ref).lower())
+    if category_id is None:
+        raise RowError(f"Categoría no encontrada: {ref}")
+    return category_id
+
+
+def _product_row(record, company_id, categories):
+    return {
+        'id_product': _string(record, 'id_product', 255) or str(uuid.uuid4()),
+        'name': _string(record, 'name', 120, required=True),
+        'description': _string(record, 'description', 10000),
+        'price': _number(record, 'price', float, required=True, minimum=0),
+        'stock': _number(record, 'stock', int, required=True),
+        'image': _string(record, 'image', 255),
+        'is_active': _boolean(record, 'is_active'),
+        'category_id': _category(record, categories),
+        'company_id': company_id,
+    }
+
+
+def _client_row(record, company_id, categories):
+    return {
+        'id': _string(record, 'id', 36) or str(uuid.uuid4()),
+        'name': _string(record, 'name', 100, required=True),
+        'email': _string(record, 'email', 120, required=True),
+        'phone': _string(record, 'phone', 20),
+        'address': _string(record, 'address', 255),
+        'document_type': _string(record, 'document_type', 20),
+        'document_number': _string(record, 'document_number', 50),
+        'avatar': _string(record, 'avatar', 255),
+        'is_active': _boolean(record, 'is_active'),
+        'category_id': _category(record, categories),
+        'company_id': company_id,
+    }
+
+
+# entidad -> (modelo, constructor de filas, columnas únicas, columnas exportadas)
+ENTITIES = {
+    'product': (Product, _product_row, ('id_product',),
+                ('id_product', 'name', 'description', 'price', 'stock', 'image', 'is_active',
+                 'category_id', 'created_at', 'updated_at')),
+    'client': (Client, _client_row, ('id', 'email', 'document_number'),
+               ('id', 'name', 'email', 'phone', 'address', 'document_type', 'document_number',
+                'avatar', 'is_active', 'category_id', 'created_at', 'updated_at')),
+}
+
+
+# Categorías de la empresa por id y por nombre, resueltas una sola vez por importación
+def _company_categories(company_id):
+    categories = {}
+    for category_id, name in db.session.query(Category.id_category, Category.name) \
+            .filter(Category.company_id == company_id):
+        categories[category_id] = category_id
+        categories[name.lower()] = category_id
+    return categories
+
+
+class _Importer:
+    def __init__(self, entity, company_id):
+        self.entity = entity
+        self.model, self.build_row, self.unique, _ = ENTITIES[entity]
+        self.company_id = company_id
+        self.categories = _company_categories(company_id)
+        self.batch_size = current_app.config['BULK_IMPORT_BATCH_SIZE']
+        self.seen = {column: set() for column in self.unique}
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    # Duplicados dentro del fichero y contra la base de datos (una consulta por columna y lote)
+    def _check_unique(self, batch):
+        existing = {}
+        for column in self.unique:
+            values = [row[column] for _, row in batch if row[column] is not None]
+            col = getattr(self.model, column)
+            existing[column] = {v for (v,) in db.session.query(col).filter(col.in_(values))} if values else set()
+
+        valid = []
+        for line, row in batch:
+            duplicate = next((c for c in self.unique if row[c] is not None and
+                              (row[c] in existing[c] or row[c] in self.seen[c])), None)
+            if duplicate:
+                self.error(line, f"{duplicate} ya existe: {row[duplicate]}")
+                continue
+            for column in self.unique:
+                if row[column] is not None:
+                    self.seen[column].add(row[column])
+            valid.append((line, row))
+        return valid
+
+    def _insert(self, batch):
+        if not batch:
+            return []
+        rows = [row for _, row in batch]
+        try:
+            db.session.execute(insert(self.model), rows)
+            db.session.commit()
+            return rows
+        except IntegrityError:
+            db.session.rollback()
+
+        # Algún conflicto concurrente: se inserta fila a fila para aislar los errores
+        inserted = []
+        for line, row in batch:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(self.model), [row])
+                inserted.append(row)
+            except IntegrityError as e:
+                self.error(line, f"Conflicto al insertar: {e.orig}")
+        db.session.commit()
+        return inserted
+
+    def flush(self, batch):
+        if not batch:
+            return
+        rows = self._insert(self._check_unique(batch))
+        if not rows:
+            return
+        self.inserted += len(rows)
+        pk = self.unique[0]
+        notify_change(self.entity, self.company_id, [row[pk] for row in rows], 'create',
+                      category_ids=sorted({row['category_id'] for row in rows}))
+
+    def run(self, records):
+        batch = []
+        for line, record in records:
+            if isinstance(record, RowError):
+                self.error(line, str(record))
+                continue
+            try:
+                batch.append((line, self.build_row(record, self.company_id, self.categories)))
+            except RowError as e:
+                self.error(line, str(e))
+                continue
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        self.flush(batch)
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda e: e["line"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+# Importa en transacciones por lotes; cada lote confirmado queda guardado
+# aunque un lote posterior falle.
+def import_records(entity, company_id, stream, fmt):
+    return _Importer(entity, company_id).run(iter_records(stream, fmt))
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+# CSV en streaming con las mismas columnas que acepta la importación. Como en
+# stream_ndjson, la consulta se recorre con una sesión propia del generador.
+def export_csv(entity, query, filename):
+    model, _, unique, columns = ENTITIES[entity]
+    query = query.order_by(model.created_at, getattr(model, unique[0])) \
+        .execution_options(yield_per=current_app.config['BULK_IMPORT_BATCH_SIZE'])
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        with stream_session() as session:
+            for index, obj in enumerate(session.scalars(query), start=1):
+                writer.writerow([_csv_value(getattr(obj, column)) for column in columns])
+                if index % 500 == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        yield buffer.getvalue()
+
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
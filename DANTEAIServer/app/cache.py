@@ -0,0 +1,193 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, make_response
+
+from app import replicas
+from app.pagination import wants_stream
+from app.signals import data_changed
+
+
+# Interfaz del backend de caché (bytes ya serializados)
+class CacheBackend:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def incr(self, key):
+        raise NotImplementedError
+
+    def counter(self, key):
+        value = self.get(key)
+        return int(value) if value is not None else 0
+
+
+# Backend en proceso con TTL y expulsión LRU; también sirve de sustituto local
+# del backend compartido en desarrollo.
+class LocalCache(CacheBackend):
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or (item[1] is not None and item[1] < time.monotonic()):
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    # Los contadores (generaciones) no entran en la expulsión LRU
+    def incr(self, key):
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+# Backend compartido entre procesos (requiere el paquete redis)
+class RedisCache(CacheBackend):
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl or None)
+
+    def incr(self, key):
+        return self.client.incr(key)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                spec = current_app.config['CATALOG_CACHE_BACKEND']
+                if spec == 'local':
+                    _backend = LocalCache(current_app.config['CATALOG_CACHE_MAX_ENTRIES'])
+                elif spec.startswith(('redis://', 'rediss://')):
+                    _backend = RedisCache(spec)
+                else:
+                    module_name, class_name = spec.split(':', 1)
+                    _backend = getattr(importlib.import_module(module_name), class_name)()
+    return _backend
+
+
+# Cada ámbito (empresa, categoría o 'all') tiene una generación; invalidar es
+# incrementarla, y las entradas viejas caducan solas por TTL/LRU.
+def _generation(backend, scope):
+    return backend.counter(f"catalog:gen:{scope}")
+
+
+def invalidate(*scopes):
+    backend = get_backend()
+    for scope in scopes:
+        backend.incr(f"catalog:gen:{scope}")
+
+
+def _request_scope():
+    if request.args.get('company_id'):
+        return f"company:{request.args['company_id']}"
+    if request.args.get('category_id'):
+        return f"category:{request.args['category_id']}"
+    return 'all'
+
+
+def catalog_cacheable():
+    return current_app.config['CATALOG_CACHE_ENABLED'] and not wants_stream()
+
+
+# Clave de la petición actual y cuerpo cacheado (None si no hay). Con un
+# backend remoto hace E/S: el modo ASGI la llama desde un hilo.
+def lookup():
+    backend = get_backend()
+    scope = _request_scope()
+    params = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    key = f"catalog:{scope}:{_generation(backend, scope)}:{request.endpoint}:{params}"
+    return key, backend.get(key)
+
+
+def hit_response(body):
+    response = current_app.response_class(body, mimetype='application/json')
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+
+# Guarda la respuesta si es cacheable y la marca como MISS
+def store(key, response):
+    if response.status_code == 200 and not response.is_streamed:
+        get_backend().set(key, response.get_data(), current_app.config['CATALOG_CACHE_TTL'])
+    response.headers['X-Cache'] = 'MISS'
+    return response
+
+
+def is_local():
+    return isinstance(get_backend(), LocalCache)
+
+
+# Cachea el cuerpo JSON de una ruta de catálogo por ámbito y parámetros
+def cached_catalog(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not catalog_cacheable():
+            return view(*args, **kwargs)
+
+        key, body = lookup()
+        if body is not None:
+            return hit_response(body)
+        replicas.use_primary()
+        return store(key, make_response(view(*args, **kwargs)))
+    return wrapper
+
+
+@data_changed.connect
+def _invalidate_catalog(entity, company_id=None, category_ids=(), **kwargs):
+    if entity not in ('product', 'category'):
+        return
+    scopes = ['all']
+    if company_id:
+        scopes.append(f"company:{company_id}")
+    scopes += [f"category:{category_id}" for category_id in category_ids if category_id]
+    invalidate(*scopes)
+
+
+def stats():
+    backend = get_backend()
+    return backend.stats() if hasattr(backend, 'stats') else {}
@@ -0,0 +1,142 @@
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.signals import data_changed
+from models.model_company_stats import CompanyStats
+from models.model_product import Product
+from models.model_client import Client
+from models.model_category import Category
+from models.model_ticket import SupportTicket
+from models.model_user import User
+
+TRACKED_ENTITIES = ('product', 'category', 'client', 'ticket')
+
+
+def _products(company_id):
+    threshold = current_app.config['LOW_STOCK_THRESHOLD']
+    row = db.session.execute(
+        select(
+            func.count(),
+            func.sum(case((Product.is_active == db.true(), 1), else_=0)),
+            func.coalesce(func.sum(Product.price * Product.stock), 0),
+            func.sum(case((Product.stock <= 0, 1), else_=0)),
+            func.sum(case(((Product.stock > 0) & (Product.stock <= threshold), 1), else_=0)),
+        ).where(Product.company_id == company_id)
+    ).one()
+    return {
+        "total": row[0],
+        "active": row[1] or 0,
+        "stock_value": round(float(row[2]), 2),
+        "out_of_stock": row[3] or 0,
+        "low_stock": row[4] or 0,
+        "low_stock_threshold": threshold,
+    }
+
+
+def _clients(company_id):
+    total, active = db.session.execute(
+        select(func.count(), func.sum(case((Client.is_active == db.true(), 1), else_=0)))
+        .where(Client.company_id == company_id)
+    ).one()
+    by_category = db.session.execute(
+        select(Client.category_id, Category.name, func.count())
+        .outerjoin(Category, Category.id_category == Client.category_id)
+        .where(Client.company_id == company_id)
+        .group_by(Client.category_id, Category.name)
+        .order_by(func.count().desc())
+    ).all()
+    return {
+        "total": total,
+        "active": active or 0,
+        "by_category": [{"category_id": c, "name": name, "count": n} for c, name, n in by_category],
+    }
+
+
+def _categories(company_id):
+    rows = db.session.execute(
+        select(Category.typeon, func.count()).where(Category.company_id == company_id).group_by(Category.typeon)
+    ).all()
+    return {"total": sum(n for _, n in rows), "by_type": {str(t): n for t, n in rows}}
+
+
+def _tickets(company_id):
+    rows = db.session.execute(
+        select(SupportTicket.status, func.count())
+        .join(User, User.id_user == SupportTicket.user_id)
+        .where(User.company_id == company_id)
+        .group_by(SupportTicket.status)
+    ).all()
+    return {"total": sum(n for _, n in rows), "by_status": {status or 'Sin estado': n for status, n in rows}}
+
+
+def compute(company_id):
+    return {
+        "products": _products(company_id),
+        "clients": _clients(company_id),
+        "categories": _categories(company_id),
+        "tickets": _tickets(company_id),
+    }
+
+
+def _greatest(column, value):
+    if db.engine.dialect.name == 'sqlite':
+        return func.max(column, value)
+    return func.greatest(column, value)
+
+
+# La fila se crea desactualizada antes del primer cálculo para que las
+# escrituras concurrentes ya queden contadas en `changes`.
+def _ensure_row(company_id):
+    try:
+        with db.session.begin_nested():
+            db.session.add(CompanyStats(company_id=company_id, stats={}, changes=1, computed_changes=0))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # otra petición la creó a la vez
+    return db.session.get(CompanyStats, company_id)
+
+
+# Solo avanza computed_changes hasta lo visto al empezar el cálculo: si hubo
+# escrituras mientras tanto la fila sigue desactualizada.
+def _save(company_id, stats, seen_changes):
+    now = datetime.utcnow()
+    db.session.execute(
+        update(CompanyStats)
+        .where(CompanyStats.company_id == company_id)
+        .values(stats=stats, computed_at=now,
+                computed_changes=_greatest(CompanyStats.computed_changes, seen_changes))
+    )
+    db.session.commit()
+    return now
+
+
+# Estadísticas de la empresa; se recalculan solo si hubo escrituras desde el último cálculo
+def get_stats(company_id):
+    row = db.session.get(CompanyStats, company_id)
+    if row is not None and row.computed_changes >= row.changes:
+        return row.stats, row.computed_at, True
+    if row is None:
+        row = _ensure_row(company_id)
+    seen_changes = row.changes
+    stats = compute(company_id)
+    computed_at = _save(company_id, stats, seen_changes)
+    return stats, computed_at, False
+
+
+def mark_stale(company_id):
+    db.session.execute(
+        update(CompanyStats)
+        .where(CompanyStats.company_id == company_id)
+        .values(changes=CompanyStats.changes + 1)
+    )
+    db.session.commit()
+
+
+@data_changed.connect
+def _on_data_changed(entity, company_id=None, **kwargs):
+    if entity in TRACKED_ENTITIES and company_id:
+        mark_stale(company_id)
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+_lock = threading.Lock()
+_stats = {}
+_engines = weakref.WeakSet()
+_extra_engines = weakref.WeakValueDictionary()  # engines fuera de Flask-SQLAlchemy (p. ej. el async)
+
+
+# Con un servidor pre-fork (--preload) los hijos heredan las conexiones abiertas
+# por el proceso padre (p. ej. al migrar); se descartan sin cerrarlas para no
+# romper las del padre y cada hijo abre las suyas.
+def _dispose_after_fork():
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
+
+
+def _count(name, key, amount=1):
+    with _lock:
+        _stats[name][key] += amount
+
+
+# Tiempo esperando una conexión libre: si crece, el pool se queda corto
+def _time_checkouts(name, pool):
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            _count(name, 'checkout_wait_seconds', time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+
+def _instrument(name, engine, app):
+    with _lock:
+        _stats.setdefault(name, {'connects': 0, 'checkouts': 0, 'checkins': 0,
+                                 'invalidated': 0, 'checkout_wait_seconds': 0.0})
+    _engines.add(engine)
+    pool = engine.pool
+    event.listen(pool, 'connect', lambda *args: _count(name, 'connects'))
+    event.listen(pool, 'checkout', lambda *args: _count(name, 'checkouts'))
+    event.listen(pool, 'checkin', lambda *args: _count(name, 'checkins'))
+    event.listen(pool, 'invalidate', lambda *args: _count(name, 'invalidated'))
+
+    _time_checkouts(name, pool)
+    # dispose() (p. ej. tras el fork) sustituye el pool: los eventos pasan al
+    # nuevo, el cronómetro de _do_get no
+    event.listen(engine, 'engine_disposed', lambda engine: _time_checkouts(name, engine.pool))
+
+    timeout = app.config.get('DB_STATEMENT_TIMEOUT_MS')
+    if engine.dialect.name == 'postgresql' and timeout and app.config.get('DB_PGBOUNCER_MODE'):
+        # SET LOCAL solo dura la transacción: seguro con pgbouncer en modo transaction
+        @event.listens_for(engine, 'begin')
+        def set_statement_timeout(connection):
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def init_app(app):
+    with app.app_context():
+        for key, engine in db.engines.items():
+            _instrument(key or 'default', engine, app)
+
+
+# Engines creados fuera de Flask-SQLAlchemy; aparecen en pool_stats con su nombre
+def instrument_engine(name, engine, app):
+    _instrument(name, engine, app)
+    _extra_engines[name] = engine
+
+
+# Uso de cada pool (principal, binds adicionales y engines registrados)
+def pool_stats():
+    data = {}
+    engines = [(key or 'default', engine) for key, engine in db.engines.items()]
+    for name, engine in engines + list(_extra_engines.items()):
+        pool = engine.pool
+        with _lock:
+            entry = dict(_stats.get(name, {}))
+        entry['pool'] = type(pool).__name__
+        for attr in ('size', 'checkedin', 'checkedout', 'overflow'):
+            if hasattr(pool, attr):
+                entry[attr] = getattr(pool, attr)()
+        data[name] = entry
+    return data
@@ -2,7 +2,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
+from app.replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # lecturas GET a réplicas
 ma = Marshmallow()
 jwt = JWTManager()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import importlib
+import os
+
+from flask import Flask
+from flask_cors import CORS
+
+from app.config import Config
+from app.extensions import db, ma, jwt
+from app.media import UploadRequest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos con modelos: se importan al crear la app para que db.metadata esté completo
+MODEL_MODULES = [
+    'models.model_user', 'models.model_product', 'models.model_company', 'models.model_category',
+    'models.model_client', 'models.model_ticket', 'models.model_message', 'models.model_conversation',
+    'models.model_company_stats', 'models.model_product_ranking', 'models.model_retrieval',
+]
+
+# Blueprints de rutas (atributo `bp` de cada módulo)
+ROUTE_MODULES = [
+    'routes.category_routes', 'routes.client_routes', 'routes.company_routes', 'routes.ticket_routes',
+    'routes.message_routes', 'routes.user_routes', 'routes.product_routes', 'routes.system_routes',
+    'routes.upload_routes', 'routes.search_routes', 'routes.bulk_routes', 'routes.assistant_routes',
+]
+
+
+# Esquema e índices versionados: `flask --app index db-upgrade`
+def db_upgrade():
+    from app.migrations import upgrade
+    applied = upgrade()
+    print("Migraciones aplicadas:", ", ".join(applied) if applied else "ninguna")
+
+
+# Los módulos de rutas y modelos (esquemas marshmallow, Pillow, etc.) se
+# importan aquí y no al importar el paquete, así crear varias apps en tests o
+# importar solo helpers no paga ese coste.
+def create_app(config=Config):
+    app = Flask('index', root_path=BASE_DIR)
+    app.request_class = UploadRequest  # límite por fichero al analizar multipart
+    app.config.from_object(config)
+
+    # Vincula la app con las extensiones
+    db.init_app(app)
+    ma.init_app(app)
+    jwt.init_app(app)
+
+    from app import db_pool, replicas, metrics
+    CORS(app, expose_headers=[replicas.STICKY_HEADER])  # read-your-writes sin cookies
+    metrics.init_app(app)
+    db_pool.init_app(app)
+    replicas.init_app(app)
+
+    for module in MODEL_MODULES:
+        importlib.import_module(module)
+    for module in ROUTE_MODULES:
+        app.register_blueprint(importlib.import_module(module).bp)
+
+    app.cli.command('db-upgrade')(db_upgrade)
+    if app.config['MIGRATE_ON_STARTUP']:
+        from app.migrations import upgrade
+        with app.app_context():
+            upgrade()
+    return app
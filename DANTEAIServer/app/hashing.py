@@ -0,0 +1,158 @@
+import hashlib
+import hmac
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+# Se lanza cuando la cola del pool está llena; las rutas responden 503
+class HashingBusy(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_slots = None
+_current_prefix = {}
+_stats = {'in_flight': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'inline': 0,
+          'rehashed': 0, 'cache_hits': 0, 'total_seconds': 0.0}
+
+# Verificaciones correctas recientes. La clave es un HMAC con secreto aleatorio
+# del proceso sobre (hash guardado, contraseña): no se guarda nada reversible y
+# al cambiar la contraseña cambia el hash, así la entrada deja de coincidir.
+_cache_key = os.urandom(32)
+_cache = OrderedDict()
+_CACHE_MAX_ENTRIES = 10000
+DEFAULT_WORKERS = 2
+
+
+def _config(name, default):
+    if has_app_context():
+        return current_app.config.get(name, default)
+    return default
+
+
+def _workers():
+    return int(_config('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS))
+
+
+# El pool se crea perezosamente en cada proceso (también tras un fork del servidor)
+def _get_pool():
+    global _pool, _pool_pid, _slots
+    workers = _workers()
+    if workers <= 0:
+        return None
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+            _pool_pid = os.getpid()
+            _slots = threading.BoundedSemaphore(workers + int(_config('PASSWORD_HASH_MAX_PENDING', 64)))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _lock:
+        _pool = None
+
+
+def _run(fn, *args):
+    pool = _get_pool()
+    if pool is None:
+        with _lock:
+            _stats['inline'] += 1
+        return fn(*args)
+
+    if not _slots.acquire(timeout=float(_config('PASSWORD_HASH_QUEUE_TIMEOUT', 5))):
+        with _lock:
+            _stats['rejected'] += 1
+        raise HashingBusy()
+
+    started = time.perf_counter()
+    with _lock:
+        _stats['in_flight'] += 1
+    outcome = 'failed'
+    try:
+        try:
+            result = pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            _reset_pool()
+            result = fn(*args)
+        outcome = 'completed'
+        return result
+    finally:
+        _slots.release()
+        with _lock:
+            _stats['in_flight'] -= 1
+            _stats[outcome] += 1
+            _stats['total_seconds'] += time.perf_counter() - started
+
+
+def _method():
+    return _config('PASSWORD_HASH_METHOD', 'scrypt')
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, _method())
+
+
+def _cache_digest(pwhash, password):
+    return hmac.new(_cache_key, f"{pwhash}\0{password}".encode('utf-8'), hashlib.sha256).digest()
+
+
+def verify_password(pwhash, password):
+    if not pwhash or password is None:
+        return False
+
+    ttl = float(_config('PASSWORD_VERIFY_CACHE_TTL', 300))
+    digest = _cache_digest(pwhash, password) if ttl > 0 else None
+    if digest is not None:
+        with _lock:
+            expires = _cache.get(digest)
+            if expires is not None and expires > time.monotonic():
+                _cache.move_to_end(digest)
+                _stats['cache_hits'] += 1
+                return True
+
+    valid = _run(check_password_hash, pwhash, password)
+
+    if valid and digest is not None:
+        with _lock:
+            _cache[digest] = time.monotonic() + ttl
+            _cache.move_to_end(digest)
+            while len(_cache) > _CACHE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+    return valid
+
+
+# True si el hash se generó con parámetros distintos de los actuales
+def needs_rehash(pwhash):
+    method = _method()
+    prefix = _current_prefix.get(method)
+    if prefix is None:
+        prefix = _current_prefix[method] = hash_password('').split('$', 1)[0]
+    return pwhash.split('$', 1)[0] != prefix
+
+
+def note_rehash():
+    with _lock:
+        _stats['rehashed'] += 1
+
+
+def stats():
+    with _lock:
+        data = dict(_stats)
+        data['cache_entries'] = len(_cache)
+    workers = _workers()
+    data['workers'] = max(workers, 0)
+    data['queued'] = max(0, data['in_flight'] - workers) if workers > 0 else 0
+    return data
@@ -0,0 +1,113 @@
+from app.extensions import db
+from models.model_conversation import ConversationSummary
+from models.model_message import Message
+from sqlalchemy import case, update, delete, or_, select
+from sqlalchemy.exc import IntegrityError
+
+
+def _decrement(column, amount):
+    return case((column > amount, column - amount), else_=0)
+
+
+def _touch(owner_id, peer_id, message, unread_increment):
+    result = db.session.execute(
+        update(ConversationSummary)
+        .where(ConversationSummary.owner_id == owner_id, ConversationSummary.peer_id == peer_id)
+        .values(last_message_id=message.id,
+                last_message_at=message.created_at,
+                unread_count=ConversationSummary.unread_count + unread_increment)
+    )
+    if result.rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(ConversationSummary(owner_id=owner_id, peer_id=peer_id,
+                                               last_message_id=message.id,
+                                               last_message_at=message.created_at,
+                                               unread_count=unread_increment))
+    except IntegrityError:
+        # Otra petición creó la fila a la vez: se reintenta como UPDATE
+        _touch(owner_id, peer_id, message, unread_increment)
+
+
+# Llamar tras hacer flush del mensaje y antes del commit
+def record_message(message):
+    _touch(message.sender_id, message.receiver_id, message, 0)
+    if message.receiver_id != message.sender_id:
+        _touch(message.receiver_id, message.sender_id, message, 0 if message.is_read else 1)
+
+
+# Resta `count` no leídos de la conversación del lector con ese emisor
+def mark_read(reader_id, sender_id, count=1):
+    if count <= 0:
+        return
+    db.session.execute(
+        update(ConversationSummary)
+        .where(ConversationSummary.owner_id == reader_id, ConversationSummary.peer_id == sender_id)
+        .values(unread_count=_decrement(ConversationSummary.unread_count, count))
+    )
+
+
+def _latest_between(user_id, other_id, exclude_id):
+    return Message.query.filter(
+        ((Message.sender_id == user_id) & (Message.receiver_id == other_id)) |
+        ((Message.sender_id == other_id) & (Message.receiver_id == user_id)),
+        Message.id != exclude_id
+    ).order_by(Message.created_at.desc(), Message.id.desc()).first()
+
+
+# Llamar antes de borrar el mensaje: ajusta contadores y el último mensaje
+def forget_message(message):
+    if not message.is_read:
+        mark_read(message.receiver_id, message.sender_id)
+    previous = None
+    summaries = ConversationSummary.query.filter_by(last_message_id=message.id).all()
+    if summaries:
+        previous = _latest_between(message.sender_id, message.receiver_id, message.id)
+    for summary in summaries:
+        if previous is None:
+            db.session.delete(summary)
+        else:
+            summary.last_message_id = previous.id
+            summary.last_message_at = previous.created_at
+
+
+def forget_user(user_id):
+    db.session.execute(
+        delete(ConversationSummary).where(
+            or_(ConversationSummary.owner_id == user_id, ConversationSummary.peer_id == user_id)
+        )
+    )
+
+
+# Reconstruye la tabla de resumen desde messages (migración / datos previos).
+# `session`: la de la migración; por defecto, la de la app.
+def rebuild_summaries(session=None):
+    session = session or db.session
+    session.execute(delete(ConversationSummary))
+    pairs = {}
+    query = select(Message.id, Message.sender_id, Message.receiver_id, Message.is_read, Message.created_at) \
+        .order_by(Message.created_at.asc(), Message.id.asc()).execution_options(yield_per=1000)
+    for message in session.execute(query):
+        sides = [(message.sender_id, message.receiver_id, 0)]
+        if message.receiver_id != message.sender_id:
+            sides.append((message.receiver_id, message.sender_id, 0 if message.is_read else 1))
+        for owner_id, peer_id, unread in sides:
+            entry = pairs.setdefault((owner_id, peer_id), [None, None, 0])
+            entry[0], entry[1] = message.id, message.created_at
+            entry[2] += unread
+    session.add_all(
+        ConversationSummary(owner_id=owner_id, peer_id=peer_id, last_message_id=last_id,
+                            last_message_at=last_at, unread_count=unread)
+        for (owner_id, peer_id), (last_id, last_at, unread) in pairs.items()
+    )
+    session.commit()
+    return len(pairs)
+
+
+def backfill_if_empty(session=None):
+    session = session or db.session
+    if session.execute(select(ConversationSummary.id).limit(1)).first() is None \
+            and session.execute(select(Message.id).limit(1)).first() is not None:
+        return rebuild_summaries(session)
+    return 0
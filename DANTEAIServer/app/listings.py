@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+
+from app.pagination import parse_limit
+from models.loading_profiles import with_profile
+from models.model_category import Category
+from models.model_client import Client
+from models.model_conversation import ConversationSummary
+from models.model_message import Message
+from models.model_product import Product
+from models.model_ticket import SupportTicket
+
+# Consultas de los listados como select(). Las ejecutan las rutas Flask (con
+# db.session, vía app/pagination.py) y las vistas async de app/asgi.py (con
+# una AsyncSession), así los dos modos devuelven las mismas filas.
+
+
+def products(company_id=None, category_id=None):
+    stmt = select(Product)
+    if company_id:
+        return stmt.filter_by(company_id=company_id)
+    if category_id:
+        return stmt.filter_by(category_id=category_id)
+    return stmt
+
+
+def categories(company_id=None, typeon=None):
+    stmt = select(Category)
+    if company_id:
+        stmt = stmt.filter_by(company_id=company_id, typeon=int(typeon))
+    return with_profile(stmt, 'categories')
+
+
+def clients(company_id):
+    return select(Client).filter_by(company_id=company_id)
+
+
+def tickets():
+    return with_profile(select(SupportTicket), 'tickets')
+
+
+def inbox(user_id):
+    return with_profile(select(ConversationSummary), 'inbox').filter_by(owner_id=user_id)
+
+
+def conversation(user_id, other_user_id):
+    return with_profile(select(Message), 'messages').filter(
+        ((Message.sender_id == user_id) & (Message.receiver_id == other_user_id)) |
+        ((Message.sender_id == other_user_id) & (Message.receiver_id == user_id))
+    )
+
+
+# Ventana de la conversación según los parámetros de la petición:
+#   ?since=<ISO> | ?after_id=   -> solo los mensajes nuevos
+#   ?before_id=<id>&limit=N     -> los N más recientes anteriores al ancla
+# `anchor` es el mensaje de after_id / before_id, ya cargado por la vista.
+# Devuelve (select, invertir): con before_id o limit las filas salen de la más
+# reciente a la más antigua y la vista las invierte. ValueError si since no es ISO.
+def conversation_window(stmt, args, anchor=None):
+    key = tuple_(Message.created_at, Message.id)
+    if args.get('after_id'):
+        stmt = stmt.filter(key > tuple_(anchor.created_at, anchor.id))
+    elif args.get('since'):
+        stmt = stmt.filter(Message.created_at > datetime.fromisoformat(args['since']))
+
+    if args.get('before_id') or 'limit' in args:
+        if args.get('before_id'):
+            stmt = stmt.filter(key < tuple_(anchor.created_at, anchor.id))
+        stmt = stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(parse_limit(args.get('limit')))
+        return stmt, True
+    return stmt.order_by(Message.created_at.asc(), Message.id.asc()), False
@@ -0,0 +1,230 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+
+from flask import current_app, abort, request, Request, Response, send_file
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+
+from app import thumbnails
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MEMORY_BYTES = 500 * 1024  # partes multipart en memoria hasta este tamaño, luego a disco
+
+# Nombre direccionado por contenido: sha256 del fichero (+ _<tamaño> en variantes) + extensión
+HASHED_NAME = re.compile(r'^([0-9a-f]{64})(_\d+)?\.[a-z0-9]+$')
+
+
+def media_folder():
+    folder = current_app.config['AVATAR_UPLOAD_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def is_content_addressed(filename):
+    return bool(filename and HASHED_NAME.match(filename))
+
+
+def _extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ''))[1].lower()
+    return ext if ext else '.bin'
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit):
+        super().__init__(limit)
+        self.limit = limit
+
+
+# Límite por tipo: imágenes y resto de ficheros
+def max_upload_bytes(filename):
+    mimetype = mimetypes.guess_type(filename or '')[0] or ''
+    if mimetype.startswith('image/'):
+        return current_app.config['UPLOAD_MAX_IMAGE_BYTES']
+    return current_app.config['UPLOAD_MAX_FILE_BYTES']
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Mueve un temporal de la carpeta de medios a su nombre definitivo (sha256);
+# si ya existía se descarta (dedup). Encola las miniaturas.
+def _store(tmp_path, hexdigest, original_name):
+    folder = media_folder()
+    filename = f"{hexdigest}{_extension(original_name)}"
+    final_path = os.path.join(folder, filename)
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, final_path)
+    thumbnails.schedule_variants(folder, filename)
+    return filename
+
+
+def store_file(tmp_path, original_name):
+    return _store(tmp_path, _hash_file(tmp_path), original_name)
+
+
+# Guarda una subida escribiendo por bloques a medida que se lee el stream,
+# cortando en cuanto supera el límite de su tipo. Es el caso de PUT
+# /api/uploads y de las sesiones; en los formularios multipart el stream es
+# la copia que ya hizo Werkzeug (ver UploadRequest).
+def save_stream(stream, original_name, max_bytes=None):
+    if max_bytes is None:
+        max_bytes = max_upload_bytes(original_name)
+    folder = media_folder()
+    digest = hashlib.sha256()
+    written = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+        return _store(tmp_path, digest.hexdigest(), original_name)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_upload(file_storage):
+    return save_stream(file_storage.stream, file_storage.filename)
+
+
+# Temporal de una parte multipart que deja de aceptar datos al pasar el límite
+class _CappedSpool(tempfile.SpooledTemporaryFile):
+    def __init__(self, limit):
+        super().__init__(max_size=SPOOL_MEMORY_BYTES, mode='rb+')
+        self.limit = limit
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+        if self.written > self.limit:
+            raise UploadTooLarge(self.limit)
+        return super().write(data)
+
+
+# Werkzeug analiza el multipart completo antes de que la vista vea
+# request.files, así que el corte de save_stream llegaría tarde. Cada parte
+# de fichero se vuelca a un _CappedSpool con el límite de su tipo y el 413
+# salta durante el análisis, sin leer el resto del cuerpo.
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return _CappedSpool(max_upload_bytes(filename))
+
+
+# Nombre devuelto por /api/uploads que el cliente adjunta a una entidad (campo *_ref)
+def referenced_upload(filename):
+    if not is_content_addressed(filename):
+        return None
+    return filename if os.path.isfile(os.path.join(media_folder(), filename)) else None
+
+
+# Los ficheros direccionados por contenido pueden estar compartidos entre
+# entidades, así que solo se borran los nombres antiguos (uuid).
+def remove_media(filename):
+    if not filename or is_content_addressed(filename):
+        return
+    folder = media_folder()
+    names = [filename]
+    for size in thumbnails.variant_sizes():
+        names += [thumbnails.variant_name(filename, size), thumbnails.variant_name(filename, size, webp=True)]
+    for name in names:
+        path = safe_join(folder, name)
+        if path and os.path.isfile(path):
+            os.remove(path)
+
+
+# WebP solo si se pide con ?format=webp o el Accept lo nombra con q > 0:
+# */* e image/* no bastan, muchos clientes que los envían no decodifican WebP.
+def wants_webp():
+    if request.args.get('format') == 'webp':
+        return True
+    return any(value.lower() == 'image/webp' and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+# Elige la variante más adecuada (?size=N y WebP si el cliente lo acepta).
+# Si aún no existe se encola y mientras tanto se sirve el original; el
+# segundo valor indica ese caso provisional.
+def _resolve_variant(folder, filename, size, webp):
+    target = thumbnails.pick_size(size)
+    if target is None:
+        return filename, False
+    candidates = [thumbnails.variant_name(filename, target, webp=True)] if webp else []
+    candidates.append(thumbnails.variant_name(filename, target))
+    for name in candidates:
+        if os.path.isfile(os.path.join(folder, name)):
+            return name, False
+    thumbnails.schedule_variants(folder, filename)
+    return filename, True
+
+
+# (fichero a servir, ruta en disco, provisional); (None, None, False) si no
+# existe. Provisional: se pidió una variante que aún no está generada.
+def resolve_media(filename, size=None, webp=False):
+    folder = media_folder()
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        return None, None, False
+    pending = False
+    if size:
+        filename, pending = _resolve_variant(folder, filename, size, webp)
+        path = os.path.join(folder, filename)
+    return filename, path, pending
+
+
+# (mimetype, etag, max_age, inmutable): los nombres direccionados por
+# contenido usan su hash como ETag; los antiguos, el calculado por send_file.
+# El original servido en lugar de una variante pendiente se cachea poco, o
+# los clientes se quedarían un año con la imagen a tamaño completo.
+def cache_policy(filename, pending=False):
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    etag = filename.replace('.', '-') if HASHED_NAME.match(filename) else True
+    if pending:
+        return mimetype, etag, current_app.config['MEDIA_PENDING_VARIANT_MAX_AGE'], False
+    if HASHED_NAME.match(filename):
+        return mimetype, etag, current_app.config['MEDIA_CACHE_MAX_AGE'], True
+    return mimetype, etag, current_app.config['MEDIA_LEGACY_CACHE_MAX_AGE'], False
+
+
+def send_media(filename, size=None, webp=False):
+    filename, path, pending = resolve_media(filename, size, webp)
+    if path is None:
+        abort(404)
+    mimetype, etag, max_age, immutable = cache_policy(filename, pending)
+
+    accel_prefix = current_app.config.get('MEDIA_ACCEL_REDIRECT_PREFIX')
+    if accel_prefix:
+        # nginx sirve los bytes (incluido Range); Flask solo valida y responde cabeceras
+        response = Response(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + filename
+        if isinstance(etag, str):
+            response.set_etag(etag)
+        response.cache_control.max_age = max_age
+        response.make_conditional(request)
+    else:
+        # conditional=True: 304 con If-None-Match y respuestas 206 para Range.
+        # Con USE_X_SENDFILE activo, send_file delega el envío al servidor web.
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=etag, max_age=max_age)
+
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.immutable = True
+    if size:
+        response.vary.add('Accept')
+    return response
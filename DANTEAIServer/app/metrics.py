@@ -0,0 +1,296 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+MAX_RECORDED_STATEMENTS = 200  # por petición, para el log de peticiones lentas
+OTHER_COMPANY = 'other'
+
+
+class Histogram:
+    def __init__(self, name, help, labels, buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # valores de etiquetas -> [cuenta por bucket..., suma, total]
+
+    def observe(self, values, amount):
+        series = self._series.get(values)
+        if series is None:
+            series = self._series[values] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, amount)] += 1
+        series[-2] += amount
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self._series.items()):
+            labels = _labels(self.labels, values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), values + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series = {}
+
+    def inc(self, values, amount=1):
+        self._series[values] = self._series.get(values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self._series.items()):
+            lines.append(f"{self.name}{_labels(self.labels, values)} {total:g}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+_lock = threading.Lock()
+_companies = set()  # valores de la etiqueta company ya en uso
+REQUESTS = Counter('dante_http_requests_total', 'Peticiones atendidas', ('endpoint', 'method', 'status'))
+LATENCY = Histogram('dante_http_request_duration_seconds', 'Latencia de la petición',
+                    ('endpoint', 'company'), LATENCY_BUCKETS)
+RESPONSE_BYTES = Histogram('dante_http_response_bytes', 'Tamaño del cuerpo de la respuesta',
+                           ('endpoint',), BYTES_BUCKETS)
+QUERIES = Histogram('dante_db_queries_per_request', 'Consultas SQL por petición',
+                    ('endpoint', 'company'), QUERY_BUCKETS)
+QUERY_SECONDS = Counter('dante_db_query_seconds_total', 'Tiempo total en consultas SQL',
+                        ('endpoint', 'company'))
+SERIALIZATION = Histogram('dante_serialization_seconds', 'Tiempo serializando la respuesta (esquemas y JSON)',
+                          ('endpoint',), LATENCY_BUCKETS)
+METRICS = (REQUESTS, LATENCY, RESPONSE_BYTES, QUERIES, QUERY_SECONDS, SERIALIZATION)
+
+
+# Estado de la petición en curso (en g): cronómetro, consultas y serialización
+class RequestMetrics:
+    __slots__ = ('started', 'endpoint', 'company', 'method', 'slow_ms', 'sql_limit', 'queries',
+                 'query_seconds', 'statements', 'serialize_seconds', 'serialize_depth', 'done')
+
+    # La configuración se copia: los streams terminan fuera del contexto de la app
+    def __init__(self, endpoint, company, method, slow_ms, sql_limit):
+        self.started = time.perf_counter()
+        self.endpoint = endpoint
+        self.company = company
+        self.method = method
+        self.slow_ms = slow_ms
+        self.sql_limit = sql_limit
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.statements = []
+        self.serialize_seconds = 0.0
+        self.serialize_depth = 0
+        self.done = False
+
+
+def _current():
+    return g.get('_metrics') if has_app_context() else None
+
+
+# Los primeros METRICS_COMPANY_LABEL_MAX valores tienen serie propia; los
+# siguientes van a 'other' para que un cliente no pueda crear series sin límite
+def _company():
+    config = current_app.config
+    if not config['METRICS_COMPANY_LABEL']:
+        return ''
+    company = request.args.get('company_id') or (request.view_args or {}).get('company_id') or ''
+    if not company or company in _companies:
+        return company
+    with _lock:
+        if len(_companies) >= config['METRICS_COMPANY_LABEL_MAX']:
+            return OTHER_COMPANY
+        _companies.add(company)
+    return company
+
+
+def start_request():
+    config = current_app.config
+    if config['METRICS_ENABLED']:
+        g._metrics = RequestMetrics(request.endpoint or 'not_found', _company(), request.method,
+                                    config['METRICS_SLOW_REQUEST_MS'], config['METRICS_SLOW_SQL_LIMIT'])
+
+
+# --- SQL (eventos del engine) ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    pending = conn.info.get('metrics_started')
+    if not pending:
+        return
+    started = pending.pop()
+    state = _current()
+    if state is None or state.done:
+        return
+    elapsed = time.perf_counter() - started
+    state.queries += 1
+    state.query_seconds += elapsed
+    if len(state.statements) < MAX_RECORDED_STATEMENTS:
+        state.statements.append((elapsed, statement))
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get('metrics_started') if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine):
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+
+# --- Serialización ---
+
+# Cronometra la serialización; las llamadas anidadas (esquema -> JSON) no se suman dos veces
+@contextmanager
+def serializing():
+    state = _current()
+    if state is None:
+        yield
+        return
+    state.serialize_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        state.serialize_depth -= 1
+        if state.serialize_depth == 0:
+            state.serialize_seconds += time.perf_counter() - started
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with serializing():
+            return super().dumps(obj, **kwargs)
+
+
+# --- Fin de la petición ---
+
+def _finish(state, status, size):
+    if state.done:
+        return
+    state.done = True
+    elapsed = time.perf_counter() - state.started
+    with _lock:
+        REQUESTS.inc((state.endpoint, state.method, str(status)))
+        LATENCY.observe((state.endpoint, state.company), elapsed)
+        QUERIES.observe((state.endpoint, state.company), state.queries)
+        QUERY_SECONDS.inc((state.endpoint, state.company), state.query_seconds)
+        SERIALIZATION.observe((state.endpoint,), state.serialize_seconds)
+        if size is not None:
+            RESPONSE_BYTES.observe((state.endpoint,), size)
+    _log_if_slow(state, status, elapsed, size)
+
+
+def _log_if_slow(state, status, elapsed, size):
+    if not state.slow_ms or elapsed * 1000 < state.slow_ms:
+        return
+    slowest = sorted(state.statements, key=lambda item: item[0], reverse=True)
+    sql = ''.join(f"\n  {seconds * 1000:.1f}ms  {' '.join(statement.split())}"
+                  for seconds, statement in slowest[:state.sql_limit])
+    logger.warning("Petición lenta %s %s (%s) company=%s: %.0fms, %s, %d consultas SQL en %.0fms, "
+                   "serialización %.0fms%s", state.method, state.endpoint, status, state.company or '-',
+                   elapsed * 1000, f"{size} bytes" if size is not None else 'streaming',
+                   state.queries, state.query_seconds * 1000, state.serialize_seconds * 1000, sql)
+
+
+def _size(chunk):
+    return len(chunk.encode('utf-8')) if isinstance(chunk, str) else len(chunk)
+
+
+def _counted(iterable, state, status):
+    size = 0
+    try:
+        for chunk in iterable:
+            size += _size(chunk)
+            yield chunk
+    finally:
+        _finish(state, status, size)
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+async def _acounted(iterable, state, status):
+    size = 0
+    try:
+        async for chunk in iterable:
+            size += _size(chunk)
+            yield chunk
+    finally:
+        _finish(state, status, size)
+        await iterable.aclose()
+
+
+# Se registran aquí las respuestas de tamaño conocido (también ficheros, sin
+# tocar su file_wrapper), los 304/HEAD y las SSE, cuya duración no es latencia;
+# los streams NDJSON, al terminar de enviarse.
+def finish_request(response):
+    state = _current()
+    if state is None:
+        return response
+    size = response.content_length if response.is_streamed else response.calculate_content_length()
+    if size is not None or response.mimetype == 'text/event-stream' \
+            or response.status_code == 304 or request.method == 'HEAD':
+        _finish(state, response.status_code, size)
+    elif hasattr(response.response, '__aiter__'):
+        response.response = _acounted(response.response, state, response.status_code)
+    else:
+        response.response = _counted(response.response, state, response.status_code)
+    return response
+
+
+def init_app(app):
+    app.json = TimedJSONProvider(app)
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+
+# Formato de texto de Prometheus
+def render():
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    from app import db_pool
+    gauges = {}
+    for pool, entry in db_pool.pool_stats().items():
+        for key, value in entry.items():
+            if isinstance(value, (int, float)):
+                gauges.setdefault(key, []).append(f"dante_db_pool_{key}{_labels(('pool',), (pool,))} {value:g}")
+    for key, samples in gauges.items():
+        lines += [f"# TYPE dante_db_pool_{key} gauge", *samples]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,240 @@
+import logging
+from datetime import datetime
+
+from app.extensions import db
+from sqlalchemy import (
+    Boolean, Column, Date, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+    UniqueConstraint, text,
+)
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = 'schema_migrations'
+# Clave del advisory lock de Postgres para que varios workers no migren a la vez.
+# Es de transacción (pg_advisory_xact_lock) para que funcione detrás de pgbouncer.
+ADVISORY_LOCK_KEY = 724201
+
+
+# Esquema de 0001 y 0002 congelado tal como era al introducir las migraciones.
+# No se deriva de los modelos: lo que cambie después (products.version, tablas
+# nuevas) llega con su propia migración y una base nueva queda igual que una
+# migrada paso a paso.
+BASE_SCHEMA = MetaData()
+
+Table(
+    'companies', BASE_SCHEMA,
+    Column('id_company', String, primary_key=True),
+    Column('name', String(120), nullable=False),
+    Column('email', String(120), nullable=False, unique=True),
+    Column('phone', String(50)),
+    Column('company_name', String(150)),
+    Column('rif', String(50)),
+    Column('address', String(250)),
+    Column('password_hash', String(256)),
+)
+Table(
+    'categories', BASE_SCHEMA,
+    Column('id_category', String, primary_key=True),
+    Column('typeon', Integer, nullable=False),
+    Column('name', String(120), nullable=False, unique=True),
+    Column('description', String(255)),
+    Column('image', String(255)),
+    Column('company_id', String, ForeignKey('companies.id_company'), nullable=False),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Index('ix_categories_company_typeon_created', 'company_id', 'typeon', 'created_at', 'id_category'),
+)
+Table(
+    'users', BASE_SCHEMA,
+    Column('id_user', String, primary_key=True),
+    Column('name', String(120), nullable=False),
+    Column('email', String(120), nullable=False, unique=True),
+    Column('phone', String(20)),
+    Column('job_title', String(100)),
+    Column('gender', String(20)),
+    Column('birth_date', Date),
+    Column('password_hash', String(256), nullable=False),
+    Column('role', String(50), nullable=False),
+    Column('avatar_url', String(255)),
+    Column('is_active', Boolean),
+    Column('is_verified', Boolean),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Column('company_id', String, ForeignKey('companies.id_company'), nullable=False),
+    Index('ix_users_company', 'company_id'),
+)
+Table(
+    'clients', BASE_SCHEMA,
+    Column('id', String(36), primary_key=True),
+    Column('company_id', String(36), ForeignKey('companies.id_company'), nullable=False),
+    Column('category_id', String(36), ForeignKey('categories.id_category'), nullable=False),
+    Column('name', String(100), nullable=False),
+    Column('email', String(120), nullable=False, unique=True),
+    Column('phone', String(20)),
+    Column('address', String(255)),
+    Column('document_type', String(20)),
+    Column('document_number', String(50), unique=True),
+    Column('avatar', String(255)),
+    Column('is_active', Boolean),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Index('ix_clients_company_created', 'company_id', 'created_at', 'id'),
+    Index('ix_clients_category', 'category_id'),
+)
+Table(
+    'messages', BASE_SCHEMA,
+    Column('id', String(36), primary_key=True),
+    Column('sender_id', String(36), ForeignKey('users.id_user'), nullable=False),
+    Column('receiver_id', String(36), ForeignKey('users.id_user'), nullable=False),
+    Column('content', Text, nullable=False),
+    Column('is_read', Boolean),
+    Column('created_at', DateTime),
+    Index('ix_messages_sender_receiver_created', 'sender_id', 'receiver_id', 'created_at'),
+)
+Table(
+    'products', BASE_SCHEMA,
+    Column('id_product', String, primary_key=True),
+    Column('name', String(120), nullable=False),
+    Column('description', Text),
+    Column('price', Float, nullable=False),
+    Column('stock', Integer, nullable=False),
+    Column('image', String(255)),
+    Column('is_active', Boolean),
+    Column('category_id', String, ForeignKey('categories.id_category'), nullable=False),
+    Column('company_id', String, ForeignKey('companies.id_company'), nullable=False),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Index('ix_products_company_created', 'company_id', 'created_at', 'id_product'),
+    Index('ix_products_category_created', 'category_id', 'created_at', 'id_product'),
+    Index('ix_products_company_active_created', 'company_id', 'created_at',
+          postgresql_where=text('is_active'), sqlite_where=text('is_active = 1')),
+)
+Table(
+    'support_tickets', BASE_SCHEMA,
+    Column('id', String(36), primary_key=True),
+    Column('subject', String(255), nullable=False),
+    Column('description', Text, nullable=False),
+    Column('status', String(50)),
+    Column('user_id', String(36), ForeignKey('users.id_user'), nullable=False),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+    Index('ix_support_tickets_user_status', 'user_id', 'status'),
+    Index('ix_support_tickets_created', 'created_at', 'id'),
+)
+Table(
+    'conversation_summaries', BASE_SCHEMA,
+    Column('id', String(36), primary_key=True),
+    Column('owner_id', String(36), ForeignKey('users.id_user'), nullable=False),
+    Column('peer_id', String(36), ForeignKey('users.id_user'), nullable=False),
+    Column('last_message_id', String(36), ForeignKey('messages.id')),
+    Column('last_message_at', DateTime),
+    Column('unread_count', Integer, nullable=False),
+    UniqueConstraint('owner_id', 'peer_id', name='uq_conversation_summaries_owner_peer'),
+    Index('ix_conversation_summaries_owner_last', 'owner_id', 'last_message_at'),
+)
+
+
+# checkfirst: las bases creadas antes con db.create_all() ya tienen las tablas
+def _create_tables(connection):
+    BASE_SCHEMA.create_all(connection)
+
+
+# Índices de consulta que falten en tablas creadas antes de declararlos
+def _create_indexes(connection):
+    for table in BASE_SCHEMA.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# Las migraciones de datos usan una sesión sobre la conexión de la migración:
+# su commit no cierra la transacción, que sigue siendo la de este paso (y en
+# Postgres, la que corre bajo el advisory lock).
+def _backfill_conversation_summaries(connection):
+    from app.inbox import backfill_if_empty
+    with Session(bind=connection) as session:
+        backfill_if_empty(session)
+
+
+def _create_search_indexes(connection):
+    from app.search import create_search_indexes
+    create_search_indexes(connection)
+
+
+def _create_company_stats(connection):
+    from models.model_company_stats import CompanyStats
+    CompanyStats.__table__.create(connection, checkfirst=True)
+
+
+def _create_product_ranking(connection):
+    from models.model_product_ranking import ProductActivityDaily, ProductScore, RankingState
+    for model in (ProductActivityDaily, ProductScore, RankingState):
+        model.__table__.create(connection, checkfirst=True)
+
+
+def _add_product_version(connection):
+    from sqlalchemy import inspect
+    columns = {column['name'] for column in inspect(connection).get_columns('products')}
+    if 'version' not in columns:
+        connection.execute(text("ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+def _create_retrieval_index(connection):
+    from models.model_retrieval import RetrievalDocument, RetrievalPosting
+    for model in (RetrievalDocument, RetrievalPosting):
+        model.__table__.create(connection, checkfirst=True)
+
+
+def _build_retrieval_index(connection):
+    from app.retrieval import rebuild
+    with Session(bind=connection) as session:
+        rebuild(session=session)
+
+
+# Migraciones en orden; cada una se aplica una sola vez y queda registrada.
+MIGRATIONS = [
+    ('0001_base_schema', _create_tables),
+    ('0002_query_indexes', _create_indexes),
+    ('0003_conversation_summaries_backfill', _backfill_conversation_summaries),
+    ('0004_search_indexes', _create_search_indexes),
+    ('0005_company_stats', _create_company_stats),
+    ('0006_product_ranking', _create_product_ranking),
+    ('0007_product_version', _add_product_version),
+    ('0008_retrieval_index', _create_retrieval_index),
+    ('0009_retrieval_index_backfill', _build_retrieval_index),
+]
+
+
+def _ensure_table(connection):
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+        "version VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def applied_migrations():
+    with db.engine.begin() as connection:
+        _ensure_table(connection)
+        return {row[0] for row in connection.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE}"))}
+
+
+def upgrade():
+    postgres = db.engine.dialect.name == 'postgresql'
+    # El lock se libera al cerrar la transacción de lock_connection
+    with db.engine.connect() as lock_connection, lock_connection.begin():
+        if postgres:
+            lock_connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': ADVISORY_LOCK_KEY})
+        done = applied_migrations()
+        applied = []
+        for version, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            logger.info("Aplicando migración %s", version)
+            with db.engine.begin() as connection:
+                migrate(connection)
+                connection.execute(
+                    text(f"INSERT INTO {MIGRATIONS_TABLE} (version, applied_at) VALUES (:v, :t)"),
+                    {'v': version, 't': datetime.utcnow()}
+                )
+            applied.append(version)
+        return applied
@@ -0,0 +1,124 @@
+import base64
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import request, jsonify, Response, stream_with_context, current_app
+from sqlalchemy import tuple_
+
+from app.extensions import db
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+STREAM_BATCH_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# El cursor es opaco para los clientes: base64 de "created_at|id"
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        created_at, pk = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), pk
+    except (ValueError, UnicodeError):
+        raise InvalidCursor(cursor)
+
+
+def parse_limit(value, default=DEFAULT_PAGE_LIMIT):
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MAX_PAGE_LIMIT))
+
+
+def wants_stream():
+    if request.args.get('stream', '').lower() in ('1', 'true', 'ndjson'):
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+
+# Orden estable (created_at, id) descendente y filtro keyset a partir del cursor
+def keyset_query(query, created_col, id_col, cursor=None):
+    query = query.order_by(created_col.desc(), id_col.desc())
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        query = query.filter(tuple_(created_col, id_col) < tuple_(created_at, pk))
+    return query
+
+
+def keyset_page(query, created_col, id_col, limit, cursor=None):
+    rows = db.session.scalars(keyset_query(query, created_col, id_col, cursor).limit(limit + 1)).all()
+    return split_page(rows, created_col, id_col, limit)
+
+
+# Recorta la fila extra pedida (limit + 1) y calcula el cursor siguiente
+def split_page(rows, created_col, id_col, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
+
+
+# Sesión propia para recorrer una consulta dentro de un cuerpo en streaming.
+# Cuando el servidor empieza a leer el generador, la sesión de la petición ya
+# se retiró en el teardown del contexto y nadie cerraría la conexión que abre
+# yield_per; esta se cierra al terminar o al cortarse el stream.
+@contextmanager
+def stream_session():
+    session = db.session.session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+# Genera una línea JSON por fila leyendo en lotes desde un cursor del servidor,
+# así la memoria no depende del tamaño de la tabla.
+def stream_ndjson(query, schema, created_col, id_col, cursor=None, limit=None):
+    query = keyset_query(query, created_col, id_col, cursor)
+    if limit:
+        query = query.limit(limit)
+    query = query.execution_options(yield_per=STREAM_BATCH_SIZE)
+    dumps = current_app.json.dumps
+
+    def generate():
+        with stream_session() as session:
+            for row in session.scalars(query):
+                yield dumps(schema.dump(row, many=False)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+# Respuesta común para las rutas de listado (`query`: un select() de app/listings.py):
+#   ?stream=ndjson          -> NDJSON en streaming
+#   ?limit=N&cursor=...     -> {"items": [...], "next_cursor": ...}
+#   sin parámetros          -> lista completa (compatibilidad con los clientes actuales)
+def list_response(query, schema, created_col, id_col):
+    cursor = request.args.get('cursor')
+    try:
+        if wants_stream():
+            limit = request.args.get('limit')
+            return stream_ndjson(query, schema, created_col, id_col, cursor,
+                                 parse_limit(limit) if limit else None)
+
+        if cursor is None and 'limit' not in request.args:
+            rows = db.session.scalars(query.order_by(created_col.desc(), id_col.desc())).all()
+            return schema.jsonify(rows), 200
+
+        limit = parse_limit(request.args.get('limit'))
+        rows, next_cursor = keyset_page(query, created_col, id_col, limit, cursor)
+    except InvalidCursor:
+        return jsonify({"message": "Cursor inválido"}), 400
+
+    return jsonify({"items": schema.dump(rows), "next_cursor": next_cursor, "limit": limit}), 200
@@ -0,0 +1,171 @@
+from datetime import datetime
+
+from sqlalchemy import case, select, update, true
+
+from app import ranking
+from app.extensions import db
+from models.model_category import Category
+from models.model_product import Product
+
+CHUNK_SIZE = 500
+MAX_BATCH_ITEMS = 10000
+
+# campo -> (tipo esperado, longitud máxima)
+PATCH_FIELDS = {
+    'name': (str, 120),
+    'description': (str, None),
+    'price': ((int, float), None),
+    'stock': (int, None),
+    'is_active': (bool, None),
+    'category_id': (str, None),
+}
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _validate(item, seen):
+    if not isinstance(item, dict):
+        raise BatchError("Cada elemento debe ser un objeto")
+    product_id = item.get('id_product')
+    if not isinstance(product_id, str) or not product_id:
+        raise BatchError("id_product es obligatorio")
+    if product_id in seen:
+        raise BatchError("id_product repetido en el lote")
+
+    patch = item.get('set') or {}
+    if not isinstance(patch, dict):
+        raise BatchError("set debe ser un objeto")
+    for field, value in patch.items():
+        if field not in PATCH_FIELDS:
+            raise BatchError(f"Campo no modificable: {field}")
+        expected, max_length = PATCH_FIELDS[field]
+        if field != 'description' and value is None:
+            raise BatchError(f"{field} no puede ser nulo")
+        if value is not None and (not isinstance(value, expected) or (expected is int and isinstance(value, bool))):
+            raise BatchError(f"{field} tiene un tipo inválido")
+        if max_length and len(value) > max_length:
+            raise BatchError(f"{field} supera {max_length} caracteres")
+    if _negative(patch.get('price')):
+        raise BatchError("price no puede ser negativo")
+
+    delta = item.get('stock_delta')
+    if delta is not None and (not isinstance(delta, int) or isinstance(delta, bool)):
+        raise BatchError("stock_delta debe ser un entero")
+    if delta is not None and 'stock' in patch:
+        raise BatchError("Use stock o stock_delta, no ambos")
+    if not patch and not delta:
+        raise BatchError("Nada que actualizar")
+
+    version = item.get('version')
+    if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+        raise BatchError("version debe ser un entero")
+    return product_id, patch, delta, version
+
+
+def _negative(value):
+    return value is not None and value < 0
+
+
+# Un UPDATE por bloque: cada columna es un CASE por id y la condición de
+# versión se evalúa por fila, así un conflicto no bloquea al resto del bloque.
+def _update_chunk(company_id, chunk, now):
+    ids = [pk for pk, _, _, _ in chunk]
+    values = {}
+    for field in PATCH_FIELDS:
+        whens = {pk: patch[field] for pk, patch, _, _ in chunk if field in patch}
+        if field == 'stock':
+            whens.update({pk: Product.stock + delta for pk, _, delta, _ in chunk if delta})
+        if whens:
+            values[field] = case(whens, value=Product.id_product, else_=getattr(Product, field))
+    values['version'] = Product.version + 1
+    values['updated_at'] = now
+
+    checks = {pk: Product.version == version for pk, _, _, version in chunk if version is not None}
+    conditions = [Product.company_id == company_id, Product.id_product.in_(ids)]
+    if checks:
+        conditions.append(case(checks, value=Product.id_product, else_=true()))
+
+    statement = update(Product).where(*conditions).values(values).execution_options(synchronize_session=False)
+    columns = (Product.id_product, Product.version, Product.stock, Product.category_id)
+    if db.session.get_bind().dialect.update_returning:
+        return {row.id_product: row for row in db.session.execute(statement.returning(*columns))}
+    db.session.execute(statement)
+    return {row.id_product: row for row in db.session.execute(
+        select(*columns).where(Product.company_id == company_id, Product.id_product.in_(ids)))}
+
+
+# Aplica parches y ajustes de stock en una sola transacción. Devuelve el
+# resultado por elemento y las categorías afectadas (para invalidar cachés).
+def apply_batch(company_id, items, atomic=False):
+    results = [None] * len(items)
+    valid = []
+    seen = set()
+    for index, item in enumerate(items):
+        try:
+            product_id, patch, delta, version = _validate(item, seen)
+        except BatchError as e:
+            results[index] = {"index": index, "id_product": item.get('id_product') if isinstance(item, dict) else None,
+                              "status": "invalid", "error": str(e)}
+            continue
+        seen.add(product_id)
+        valid.append((index, (product_id, patch, delta, version)))
+
+    # Las categorías destino deben ser de la misma empresa (una consulta)
+    targets = {patch['category_id'] for _, (_, patch, _, _) in valid if 'category_id' in patch}
+    allowed = set()
+    if targets:
+        allowed = {c for (c,) in db.session.query(Category.id_category)
+                   .filter(Category.company_id == company_id, Category.id_category.in_(targets))}
+    checked = []
+    for index, entry in valid:
+        category_id = entry[1].get('category_id')
+        if category_id is not None and category_id not in allowed:
+            results[index] = {"index": index, "id_product": entry[0], "status": "invalid",
+                              "error": f"Categoría no encontrada: {category_id}"}
+        else:
+            checked.append((index, entry))
+
+    now = datetime.utcnow()
+    updated_ids = []
+    category_ids = set()
+    for start in range(0, len(checked), CHUNK_SIZE):
+        chunk = checked[start:start + CHUNK_SIZE]
+        ids = [entry[0] for _, entry in chunk]
+
+        # Estado previo bloqueado: stock anterior para el ranking y categorías de origen
+        previous_query = select(Product.id_product, Product.stock, Product.version, Product.category_id) \
+            .where(Product.company_id == company_id, Product.id_product.in_(ids))
+        if db.engine.dialect.name == 'postgresql':
+            previous_query = previous_query.with_for_update()
+        previous = {row.id_product: row for row in db.session.execute(previous_query)}
+
+        rows = _update_chunk(company_id, [entry for _, entry in chunk], now)
+        for index, (product_id, patch, delta, version) in chunk:
+            before = previous.get(product_id)
+            row = rows.get(product_id)
+            if before is None:
+                results[index] = {"index": index, "id_product": product_id, "status": "not_found"}
+            elif row is None or row.version == before.version:
+                results[index] = {"index": index, "id_product": product_id, "status": "conflict",
+                                  "version": before.version}
+            else:
+                results[index] = {"index": index, "id_product": product_id, "status": "updated",
+                                  "version": row.version, "stock": row.stock}
+                updated_ids.append(product_id)
+                category_ids.update((before.category_id, row.category_id))
+                if row.stock != before.stock:
+                    ranking.record_movement(company_id, product_id, before.stock, row.stock)
+
+    failed = any(result["status"] != "updated" for result in results)
+    if atomic and failed:
+        db.session.rollback()
+        for result in results:
+            if result["status"] == "updated":
+                result.update(status="rolled_back")
+                result.pop("version", None)
+                result.pop("stock", None)
+        return results, [], set()
+    db.session.commit()
+    return results, updated_ids, category_ids
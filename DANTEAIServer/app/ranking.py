@@ -0,0 +1,153 @@
+from datetime import date, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from models.model_product import Product
+from models.model_product_ranking import ProductActivityDaily, ProductScore, RankingState
+
+# ventana -> (columna de puntuación, días; None = desde siempre)
+WINDOWS = {
+    '7d': ('units_7d', 7),
+    '30d': ('units_30d', 30),
+    'all': ('units_total', None),
+}
+
+
+def _today():
+    return date.today()
+
+
+def _upsert(model, key, values, increments):
+    table = model.__table__
+    where = [table.c[name] == value for name, value in key.items()]
+    result = db.session.execute(
+        update(model).where(*where).values({name: table.c[name] + amount for name, amount in increments.items()})
+    )
+    if result.rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(model(**key, **values, **increments))
+    except IntegrityError:
+        # Otra petición creó la fila a la vez: se reintenta como UPDATE
+        _upsert(model, key, values, increments)
+
+
+def _ensure_state(company_id, today):
+    if db.session.get(RankingState, company_id) is not None:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(RankingState(company_id=company_id, rolled_on=today))
+    except IntegrityError:
+        pass  # otra petición la creó a la vez
+
+
+def units_moved(old_stock, new_stock):
+    delta = (new_stock or 0) - (old_stock or 0)
+    if current_app.config['TOP_PRODUCTS_SCORE'] == 'movement':
+        return abs(delta)
+    return max(-delta, 0)  # 'sold': solo cuentan las salidas de stock
+
+
+# Llamar antes del commit del cambio de stock (misma transacción)
+def record_stock_change(product, old_stock, new_stock):
+    record_movement(product.company_id, product.id_product, old_stock, new_stock)
+
+
+def record_movement(company_id, product_id, old_stock, new_stock):
+    units = units_moved(old_stock, new_stock)
+    if units <= 0:
+        return
+    today = _today()
+    _ensure_state(company_id, today)
+    _upsert(ProductActivityDaily, {'product_id': product_id, 'day': today},
+            {'company_id': company_id}, {'units': units})
+    _upsert(ProductScore, {'product_id': product_id}, {'company_id': company_id},
+            {name: units for name, _ in WINDOWS.values()})
+
+
+# Llamar antes de borrar el producto
+def forget_product(product_id):
+    db.session.execute(delete(ProductScore).where(ProductScore.product_id == product_id))
+    db.session.execute(delete(ProductActivityDaily).where(ProductActivityDaily.product_id == product_id))
+
+
+# Alinea las ventanas de la empresa con hoy restando los días que salen de
+# ellas. Se hace una vez al día por empresa; el UPDATE condicional de
+# rolled_on evita que dos peticiones resten lo mismo.
+def roll_windows(company_id):
+    today = _today()
+    state = db.session.get(RankingState, company_id)
+    if state is None or state.rolled_on >= today:
+        return
+    rolled_on = state.rolled_on
+    claimed = db.session.execute(
+        update(RankingState)
+        .where(RankingState.company_id == company_id, RankingState.rolled_on == rolled_on)
+        .values(rolled_on=today)
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return
+
+    for column, days in WINDOWS.values():
+        if days is None:
+            continue
+        first = rolled_on - timedelta(days=days - 1)
+        last = today - timedelta(days=days)
+        if last < first:
+            continue
+        expired = (
+            select(func.coalesce(func.sum(ProductActivityDaily.units), 0))
+            .where(ProductActivityDaily.product_id == ProductScore.product_id,
+                   ProductActivityDaily.day.between(first, last))
+            .scalar_subquery()
+        )
+        touched = (
+            select(ProductActivityDaily.product_id)
+            .where(ProductActivityDaily.company_id == company_id,
+                   ProductActivityDaily.day.between(first, last))
+        )
+        db.session.execute(
+            update(ProductScore)
+            .where(ProductScore.company_id == company_id, ProductScore.product_id.in_(touched))
+            .values({column: getattr(ProductScore, column) - expired})
+        )
+
+    # Los días fuera de todas las ventanas ya no hacen falta (el total no los usa)
+    longest = max(days for _, days in WINDOWS.values() if days)
+    db.session.execute(
+        delete(ProductActivityDaily)
+        .where(ProductActivityDaily.company_id == company_id,
+               ProductActivityDaily.day <= today - timedelta(days=longest))
+    )
+    db.session.commit()
+
+
+# El ranking global lee las puntuaciones de todas las empresas: se alinean
+# antes las que no se han puesto al día hoy (las que nadie consulta por separado)
+def roll_stale_windows():
+    stale = db.session.scalars(select(RankingState.company_id).where(RankingState.rolled_on < _today())).all()
+    for company_id in stale:
+        roll_windows(company_id)
+
+
+# Top-K de productos activos de la empresa (o de todas) en la ventana pedida
+def top_products(company_id, window='7d', limit=10):
+    column = getattr(ProductScore, WINDOWS[window][0])
+    if company_id:
+        roll_windows(company_id)
+    else:
+        roll_stale_windows()
+    query = (
+        db.session.query(Product, column)
+        .join(ProductScore, ProductScore.product_id == Product.id_product)
+        .filter(column > 0, Product.is_active == db.true())
+    )
+    if company_id:
+        query = query.filter(ProductScore.company_id == company_id)
+    return query.order_by(column.desc(), Product.id_product).limit(limit).all()
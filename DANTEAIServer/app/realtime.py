@@ -0,0 +1,112 @@
+import importlib
+import itertools
+import json
+import queue
+import threading
+
+from flask import current_app
+
+
+# Interfaz del broker de eventos. La implementación local reparte en memoria
+# dentro del proceso; para varios nodos basta con otra clase (Redis, NATS...)
+# configurada en REALTIME_BROKER = 'modulo:Clase'.
+class Broker:
+    def publish(self, channel, payload):
+        raise NotImplementedError
+
+    def subscribe(self, channel, callback):
+        raise NotImplementedError
+
+    def unsubscribe(self, channel, token):
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._tokens = itertools.count(1)
+
+    def publish(self, channel, payload):
+        with self._lock:
+            callbacks = list(self._channels.get(channel, {}).values())
+        for callback in callbacks:
+            callback(payload)
+        return len(callbacks)
+
+    def subscribe(self, channel, callback):
+        token = next(self._tokens)
+        with self._lock:
+            self._channels.setdefault(channel, {})[token] = callback
+        return token
+
+    def unsubscribe(self, channel, token):
+        with self._lock:
+            subscribers = self._channels.get(channel)
+            if subscribers is None:
+                return
+            subscribers.pop(token, None)
+            if not subscribers:
+                del self._channels[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._channels.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = current_app.config.get('REALTIME_BROKER')
+                if path:
+                    module_name, class_name = path.split(':', 1)
+                    _broker = getattr(importlib.import_module(module_name), class_name)()
+                else:
+                    _broker = LocalBroker()
+    return _broker
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+# Publica un mensaje serializado a emisor y receptor
+def publish_message(message_data):
+    broker = get_broker()
+    broker.publish(user_channel(message_data['receiver_id']), ('message', message_data))
+    if message_data['sender_id'] != message_data['receiver_id']:
+        broker.publish(user_channel(message_data['sender_id']), ('message', message_data))
+
+
+# Generador SSE para servidores WSGI: bloquea un hilo por conexión,
+# por eso el modo asyncio (app/realtime_server.py) es el recomendado en producción.
+def sse_stream(user_id, keepalive):
+    broker = get_broker()
+    events = queue.Queue()
+    channel = user_channel(user_id)
+    token = broker.subscribe(channel, events.put)
+
+    def generate():
+        try:
+            yield ": conectado\n\n"
+            while True:
+                try:
+                    event, data = events.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event, data)
+        finally:
+            broker.unsubscribe(channel, token)
+
+    return generate()
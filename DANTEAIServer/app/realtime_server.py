@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import threading
+
+from app.realtime import get_broker, user_channel, format_sse
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = '/api/messages/stream/'
+HEADER_TIMEOUT = 10
+
+SSE_HEADERS = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/event-stream\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: keep-alive\r\n"
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"\r\n"
+)
+NOT_FOUND = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+# Eventos SSE de un usuario (comentario inicial, mensajes y keepalive); lo usan
+# este servidor y el modo ASGI (app/asgi.py).
+async def sse_events(broker, user_id, keepalive):
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    channel = user_channel(user_id)
+    # El broker puede publicar desde hilos WSGI: se entrega al loop de forma segura
+    token = broker.subscribe(channel, lambda payload: loop.call_soon_threadsafe(events.put_nowait, payload))
+    try:
+        yield ": conectado\n\n"
+        while True:
+            try:
+                event, data = await asyncio.wait_for(events.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event, data)
+    finally:
+        broker.unsubscribe(channel, token)
+
+
+# Servidor SSE sobre asyncio: cada conexión inactiva cuesta una corrutina y un
+# socket, no un hilo, así un proceso mantiene miles de chats abiertos.
+# Atiende la misma ruta que Flask (/api/messages/stream/<user_id>) en otro puerto.
+class RealtimeServer:
+    def __init__(self, broker, keepalive=15):
+        self.broker = broker
+        self.keepalive = keepalive
+        self.connections = 0
+
+    async def _read_request(self, reader):
+        request_line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+        while True:
+            line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT)
+            if line in (b'\r\n', b'\n', b''):
+                break
+        parts = request_line.decode('latin-1').split()
+        if len(parts) < 2 or parts[0] != 'GET':
+            return None
+        path = parts[1].split('?', 1)[0]
+        if not path.startswith(STREAM_PREFIX):
+            return None
+        user_id = path[len(STREAM_PREFIX):]
+        return user_id if user_id and '/' not in user_id else None
+
+    async def handle(self, reader, writer):
+        try:
+            user_id = await self._read_request(reader)
+        except (asyncio.TimeoutError, ConnectionError, UnicodeError):
+            writer.close()
+            return
+        if user_id is None:
+            writer.write(NOT_FOUND)
+            writer.close()
+            return
+
+        self.connections += 1
+        events = sse_events(self.broker, user_id, self.keepalive)
+        try:
+            writer.write(SSE_HEADERS)
+            async for chunk in events:
+                writer.write(chunk.encode('utf-8'))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections -= 1
+            await events.aclose()
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        logger.info("Servidor SSE asyncio escuchando en %s:%s", host, port)
+        async with server:
+            await server.serve_forever()
+
+
+# Arranca el servidor en un hilo propio compartiendo el broker del proceso Flask
+def start_in_thread(app, host='0.0.0.0', port=5001):
+    with app.app_context():
+        broker = get_broker()
+    server = RealtimeServer(broker, keepalive=app.config.get('REALTIME_KEEPALIVE', 15))
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(host, port),),
+                              name='realtime-sse', daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,174 @@
+import itertools
+import threading
+import time
+
+from flask import g, has_request_context, request, current_app
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import text
+from sqlalchemy.sql import Select, TextClause
+
+REPLICA_PREFIX = 'replica_'
+READ_METHODS = ('GET', 'HEAD')
+STICKY_COOKIE = 'dante_last_write'
+STICKY_HEADER = 'X-Last-Write'
+# Marca en el environ de las peticiones que solo leen del primario (las vistas
+# async de app/asgi.py usan su propio engine): no se elige réplica
+PRIMARY_ONLY_ENVIRON = 'dante.primary_only'
+LAG_MAX_BACKOFF = 60  # segundos entre comprobaciones de una réplica que no responde
+
+_lock = threading.Lock()
+_round_robin = itertools.count()
+_lag = {}  # bind -> (segundos de retraso o None si falla, próxima comprobación, fallos seguidos)
+_probing = set()
+_stats = {}
+
+_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def _is_read(clause):
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() == 'SELECT'
+    return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+# Sesión que envía las lecturas a la réplica elegida para la petición. Los
+# flush y cualquier escritura van al primario, y desde ese momento el resto
+# de la petición también lee del primario.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get('db_replica'):
+            if not self._flushing and _is_read(clause):
+                return self._db.engines[g.db_replica]
+            g.db_replica = None
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def replica_binds(app):
+    return sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {}
+                  if key and key.startswith(REPLICA_PREFIX))
+
+
+def _measure_lag(engine):
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+    with engine.connect() as connection:
+        lag = connection.execute(_LAG_QUERY).scalar()
+    return float(lag) if lag is not None else 0.0
+
+
+# Retraso de la réplica, medido como mucho cada REPLICA_LAG_CHECK_INTERVAL
+# segundos y por una sola petición a la vez: las demás usan el último valor.
+# Tras un fallo el intervalo se duplica (hasta LAG_MAX_BACKOFF), para no
+# pagar el timeout de conexión en una petición cada pocos segundos.
+def replica_lag(key):
+    from app.extensions import db
+    now = time.monotonic()
+    with _lock:
+        cached = _lag.get(key)
+        if key in _probing or (cached and now < cached[1]):
+            return cached[0] if cached else None
+        _probing.add(key)
+    try:
+        lag = _measure_lag(db.engines[key])
+    except Exception as e:
+        current_app.logger.warning("Réplica %s no disponible: %s", key, e)
+        lag = None
+    finally:
+        with _lock:
+            _probing.discard(key)
+    failures = 0 if lag is not None else (cached[2] + 1 if cached else 1)
+    interval = min(current_app.config['REPLICA_LAG_CHECK_INTERVAL'] * 2 ** failures, LAG_MAX_BACKOFF)
+    with _lock:
+        _lag[key] = (lag, time.monotonic() + interval, failures)
+    return lag
+
+
+def _healthy_replicas(app):
+    max_lag = app.config['REPLICA_MAX_LAG_SECONDS']
+    healthy = []
+    for key in replica_binds(app):
+        lag = replica_lag(key)
+        if lag is not None and lag <= max_lag:
+            healthy.append(key)
+    return healthy
+
+
+# Marca de "escribió hace poco" firmada con SECRET_KEY; la fecha de la
+# escritura va en la firma. Viaja con el cliente (cookie o cabecera
+# X-Last-Write para clientes sin cookies), así la ve cualquier worker sin
+# depender de un backend compartido.
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt='replica-sticky')
+
+
+def _recent_write():
+    token = request.headers.get(STICKY_HEADER) or request.cookies.get(STICKY_COOKIE)
+    if not token:
+        return False
+    try:
+        _serializer().loads(token, max_age=current_app.config['REPLICA_STICKY_SECONDS'])
+    except BadSignature:
+        return False
+    return True
+
+
+def _count(key, name):
+    with _lock:
+        entry = _stats.setdefault(key, {'reads': 0, 'sticky': 0, 'fallbacks': 0})
+        entry[name] += 1
+
+
+def _choose_replica():
+    g.db_replica = None
+    app = current_app._get_current_object()
+    if request.method not in READ_METHODS or request.environ.get(PRIMARY_ONLY_ENVIRON) \
+            or not replica_binds(app):
+        return
+    if _recent_write():
+        _count('primary', 'sticky')
+        return
+    healthy = _healthy_replicas(app)
+    if not healthy:
+        _count('primary', 'fallbacks')
+        return
+    g.db_replica = healthy[next(_round_robin) % len(healthy)]
+    _count(g.db_replica, 'reads')
+
+
+# Tras una escritura correcta el cliente lee del primario durante
+# REPLICA_STICKY_SECONDS, más que el retraso máximo tolerado.
+def _remember_write(response):
+    if request.method not in READ_METHODS + ('OPTIONS',) and response.status_code < 400 \
+            and replica_binds(current_app):
+        token = _serializer().dumps('w')
+        response.set_cookie(STICKY_COOKIE, token, max_age=current_app.config['REPLICA_STICKY_SECONDS'],
+                            httponly=True, samesite='Lax')
+        response.headers[STICKY_HEADER] = token
+    return response
+
+
+# El resto de la petición lee del primario. Lo usa la caché de catálogo al
+# rellenar una entrada: tras una escritura la generación ya es nueva, y una
+# réplica retrasada guardaría datos viejos bajo esa clave hasta el TTL.
+def use_primary():
+    if has_request_context():
+        g.db_replica = None
+
+
+def init_app(app):
+    app.before_request(_choose_replica)
+    app.after_request(_remember_write)
+
+
+def stats():
+    app = current_app._get_current_object()
+    with _lock:
+        data = {key: dict(value) for key, value in _stats.items()}
+        for key in replica_binds(app):
+            lag = _lag.get(key)
+            data.setdefault(key, {'reads': 0, 'sticky': 0, 'fallbacks': 0})['lag_seconds'] = lag[0] if lag else None
+    return data
@@ -0,0 +1,259 @@
+import importlib
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.signals import data_changed
+from models.model_category import Category
+from models.model_client import Client
+from models.model_product import Product
+from models.model_retrieval import RetrievalDocument, RetrievalPosting
+from models.model_ticket import SupportTicket
+from models.model_user import User
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TERM_LENGTH = 64
+STOPWORDS = {
+    'de', 'la', 'el', 'en', 'y', 'a', 'los', 'las', 'del', 'un', 'una', 'por', 'para', 'con',
+    'que', 'se', 'al', 'lo', 'su', 'sus', 'es', 'o', 'no', 'mi', 'me', 'the', 'and', 'of', 'to',
+}
+
+
+def tokenize(text):
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return [t[:MAX_TERM_LENGTH] for t in re.findall(r'\w+', text) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _join(*parts):
+    return ' '.join(str(p) for p in parts if p not in (None, ''))
+
+
+# entidad -> (modelo, columna id, título, texto indexado, empresa del registro)
+ENTITIES = {
+    'product': (Product, Product.id_product,
+                lambda p: p.name, lambda p: _join(p.name, p.description), lambda p: p.company_id),
+    'client': (Client, Client.id,
+               lambda c: c.name,
+               lambda c: _join(c.name, c.email, c.document_type, c.document_number, c.phone, c.address),
+               lambda c: c.company_id),
+    'category': (Category, Category.id_category,
+                 lambda c: c.name, lambda c: _join(c.name, c.description), lambda c: c.company_id),
+    'ticket': (SupportTicket, SupportTicket.id,
+               lambda t: t.subject, lambda t: _join(t.subject, t.description, t.status),
+               lambda t: t.user.company_id if t.user else None),
+}
+
+
+# -------------------- embeddings opcionales --------------------
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+# ASSISTANT_EMBEDDER = 'modulo:funcion'; la función recibe una lista de textos
+# y devuelve un vector por texto (p. ej. un modelo local de sentence-transformers).
+def get_embedder():
+    global _embedder
+    spec = current_app.config.get('ASSISTANT_EMBEDDER')
+    if not spec:
+        return None
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                module_name, name = spec.split(':', 1)
+                _embedder = getattr(importlib.import_module(module_name), name)
+    return _embedder
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+# -------------------- indexado --------------------
+
+def _document_id(entity, entity_id):
+    return f"{entity}:{entity_id}"
+
+
+def remove_documents(entity, ids, session=None):
+    session = session or db.session
+    doc_ids = [_document_id(entity, i) for i in ids]
+    if not doc_ids:
+        return
+    session.execute(delete(RetrievalPosting).where(RetrievalPosting.document_id.in_(doc_ids)))
+    session.execute(delete(RetrievalDocument).where(RetrievalDocument.id.in_(doc_ids)))
+
+
+# Sustituye las filas del índice de esos registros en un savepoint. Si otra
+# petición reindexa los mismos a la vez, el INSERT choca con la clave primaria:
+# se repite una vez, ya con las filas de la otra confirmadas y borrables.
+def _replace_documents(session, entity, ids, documents, postings, retry=True):
+    try:
+        with session.begin_nested():
+            remove_documents(entity, ids, session)
+            if documents:
+                session.execute(insert(RetrievalDocument), documents)
+                session.execute(insert(RetrievalPosting), postings)
+    except IntegrityError:
+        if not retry:
+            raise
+        _replace_documents(session, entity, ids, documents, postings, retry=False)
+
+
+# (Re)indexa los registros indicados; los que ya no existen se eliminan del índice
+def index_documents(entity, ids, session=None):
+    session = session or db.session
+    model, id_col, title_of, text_of, company_of = ENTITIES[entity]
+    ids = list(ids)
+    query = session.query(model).filter(id_col.in_(ids))
+    if entity == 'ticket':
+        query = query.options(joinedload(SupportTicket.user))
+    objects = query.all() if ids else []
+
+    documents, postings, texts = [], [], []
+    now = datetime.utcnow()
+    for obj in objects:
+        company_id = company_of(obj)
+        terms = tokenize(text_of(obj))
+        if not company_id or not terms:
+            continue
+        doc_id = _document_id(entity, getattr(obj, id_col.key))
+        documents.append({'id': doc_id, 'company_id': company_id, 'entity': entity,
+                          'entity_id': getattr(obj, id_col.key), 'title': (title_of(obj) or '')[:255],
+                          'length': len(terms), 'embedding': None, 'indexed_at': now})
+        postings += [{'document_id': doc_id, 'term': term, 'company_id': company_id, 'tf': tf}
+                     for term, tf in Counter(terms).items()]
+        texts.append(text_of(obj))
+
+    embedder = get_embedder()
+    if embedder and documents:
+        for document, vector in zip(documents, embedder(texts)):
+            document['embedding'] = _normalize([float(x) for x in vector])
+
+    _replace_documents(session, entity, ids, documents, postings)
+
+
+# `session`: la de la migración 0009; por defecto, la de la app
+def rebuild(company_id=None, session=None):
+    session = session or db.session
+    for entity, (model, id_col, *_rest) in ENTITIES.items():
+        query = session.query(id_col)
+        if company_id and entity == 'ticket':
+            query = query.join(User, User.id_user == SupportTicket.user_id).filter(User.company_id == company_id)
+        elif company_id:
+            query = query.filter(model.company_id == company_id)
+        ids = [row[0] for row in query]
+        for start in range(0, len(ids), 1000):
+            index_documents(entity, ids[start:start + 1000], session)
+    session.commit()
+
+
+# El cambio ya está confirmado cuando llega la señal: si el índice falla se
+# registra y la petición responde igual (rebuild() lo pone al día).
+@data_changed.connect
+def _on_data_changed(entity, ids=(), action=None, **kwargs):
+    if entity not in ENTITIES or not current_app.config['ASSISTANT_INDEX_ENABLED']:
+        return
+    try:
+        if action == 'delete':
+            remove_documents(entity, ids)
+        else:
+            index_documents(entity, ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("No se pudo actualizar el índice del asistente: %s %s", entity, list(ids))
+
+
+# -------------------- consulta --------------------
+
+# n_docs, la longitud media y df se cuentan sobre la misma población: los
+# documentos de la empresa de las entidades pedidas.
+def _bm25(company_id, terms, entities):
+    totals = select(func.count(), func.avg(RetrievalDocument.length)) \
+        .where(RetrievalDocument.company_id == company_id)
+    if entities:
+        totals = totals.where(RetrievalDocument.entity.in_(entities))
+    n_docs, avg_length = db.session.execute(totals).one()
+    if not n_docs:
+        return {}
+    avg_length = float(avg_length or 1)
+
+    query = (
+        select(RetrievalPosting.document_id, RetrievalPosting.term, RetrievalPosting.tf, RetrievalDocument.length)
+        .join(RetrievalDocument, RetrievalDocument.id == RetrievalPosting.document_id)
+        .where(RetrievalPosting.company_id == company_id, RetrievalPosting.term.in_(set(terms)))
+    )
+    if entities:
+        query = query.where(RetrievalDocument.entity.in_(entities))
+    rows = db.session.execute(query).all()
+
+    df = Counter(term for _, term, _, _ in rows)
+    weights = Counter(terms)
+    scores = defaultdict(float)
+    for doc_id, term, tf, length in rows:
+        idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+        norm = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+        scores[doc_id] += weights[term] * idf * norm
+    return scores
+
+
+def _vector_scores(company_id, q, entities):
+    embedder = get_embedder()
+    if not embedder:
+        return {}
+    query_vector = _normalize([float(x) for x in embedder([q])[0]])
+    query = select(RetrievalDocument.id, RetrievalDocument.embedding).where(
+        RetrievalDocument.company_id == company_id, RetrievalDocument.embedding.isnot(None))
+    if entities:
+        query = query.where(RetrievalDocument.entity.in_(entities))
+    return {doc_id: sum(a * b for a, b in zip(query_vector, vector))
+            for doc_id, vector in db.session.execute(query) if vector}
+
+
+# Documentos más relevantes: BM25 y, con embeddings, mezcla lineal de ambas
+# puntuaciones normalizadas (peso ASSISTANT_VECTOR_WEIGHT para la vectorial).
+def top_documents(company_id, q, k=5, entities=None):
+    terms = tokenize(q)
+    lexical = _bm25(company_id, terms, entities) if terms else {}
+    vector = _vector_scores(company_id, q, entities)
+    if vector:
+        weight = current_app.config['ASSISTANT_VECTOR_WEIGHT']
+        top = max(lexical.values(), default=0) or 1.0
+        scores = {doc_id: (1 - weight) * lexical.get(doc_id, 0) / top + weight * max(vector.get(doc_id, 0), 0)
+                  for doc_id in set(lexical) | set(vector)}
+    else:
+        scores = lexical
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def load_records(ranked, schemas):
+    by_entity = defaultdict(list)
+    for doc_id, _ in ranked:
+        entity, entity_id = doc_id.split(':', 1)
+        by_entity[entity].append(entity_id)
+    objects = {}
+    for entity, ids in by_entity.items():
+        model, id_col = ENTITIES[entity][:2]
+        for obj in model.query.filter(id_col.in_(ids)):
+            objects[_document_id(entity, getattr(obj, id_col.key))] = (entity, obj)
+
+    records = []
+    for doc_id, score in ranked:
+        if doc_id not in objects:
+            continue
+        entity, obj = objects[doc_id]
+        records.append({"type": entity, "id": doc_id.split(':', 1)[1], "score": round(score, 4),
+                        "data": schemas[entity].dump(obj)})
+    return records
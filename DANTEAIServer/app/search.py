@@ -0,0 +1,141 @@
+import re
+
+from sqlalchemy import or_, text
+
+from app.extensions import db
+
+MAX_TERMS = 8
+
+# Las expresiones de los índices y de las consultas deben coincidir literalmente
+# para que Postgres use los índices GIN.
+PRODUCT_TSV = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
+CLIENT_TEXT = "(coalesce(name, '') || ' ' || coalesce(email, '') || ' ' || coalesce(document_number, ''))"
+CLIENT_TSV = f"to_tsvector('simple', {CLIENT_TEXT})"
+
+# (tabla, columna id, columnas indexadas) de cada entidad buscable
+ENTITIES = {
+    'products': ('products', 'id_product', ('name', 'description')),
+    'clients': ('clients', 'id', ('name', 'email', 'document_number')),
+}
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_products_search_tsv ON products USING gin ({PRODUCT_TSV})",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_clients_search_tsv ON clients USING gin ({CLIENT_TSV})",
+    f"CREATE INDEX IF NOT EXISTS ix_clients_search_trgm ON clients USING gin ({CLIENT_TEXT} gin_trgm_ops)",
+]
+
+POSTGRES_SQL = {
+    'products': (
+        "SELECT id_product AS id, ts_rank({tsv}, query) * 2 + word_similarity(:q, name) AS score "
+        "FROM products, to_tsquery('simple', :tsquery) AS query "
+        "WHERE company_id = :company_id AND ({tsv} @@ query OR :q <% name) "
+        "ORDER BY score DESC, id_product LIMIT :limit OFFSET :offset"
+    ).format(tsv=PRODUCT_TSV),
+    'clients': (
+        "SELECT id, ts_rank({tsv}, query) * 2 + word_similarity(:q, {text}) AS score "
+        "FROM clients, to_tsquery('simple', :tsquery) AS query "
+        "WHERE company_id = :company_id AND ({tsv} @@ query OR :q <% {text}) "
+        "ORDER BY score DESC, id LIMIT :limit OFFSET :offset"
+    ).format(tsv=CLIENT_TSV, text=CLIENT_TEXT),
+}
+
+SQLITE_SQL = (
+    "SELECT id, -bm25({fts}) AS score FROM {fts} "
+    "WHERE {fts} MATCH :match AND company_id = :company_id "
+    "ORDER BY score DESC, id LIMIT :limit OFFSET :offset"
+)
+
+
+# SQLite (desarrollo): tabla FTS5 por entidad sincronizada con triggers
+def _sqlite_ddl(entity):
+    table, pk, columns = ENTITIES[entity]
+    fts = f"{table}_fts"
+    cols = ', '.join(columns)
+    new_values = ', '.join(f"new.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"id UNINDEXED, company_id UNINDEXED, {cols}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts} (id, company_id, {cols}) VALUES (new.{pk}, new.company_id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {fts} WHERE id = old.{pk}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"DELETE FROM {fts} WHERE id = old.{pk}; "
+        f"INSERT INTO {fts} (id, company_id, {cols}) VALUES (new.{pk}, new.company_id, {new_values}); END",
+        f"DELETE FROM {fts}",
+        f"INSERT INTO {fts} (id, company_id, {cols}) SELECT {pk}, company_id, {cols} FROM {table}",
+    ]
+
+
+def create_search_indexes(connection):
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        statements = POSTGRES_DDL
+    elif dialect == 'sqlite':
+        statements = [sql for entity in ENTITIES for sql in _sqlite_ddl(entity)]
+    else:
+        return
+    for sql in statements:
+        connection.execute(text(sql))
+
+
+def terms(q):
+    return re.findall(r'\w+', (q or '').lower())[:MAX_TERMS]
+
+
+def _has_fts(entity):
+    table = f"{ENTITIES[entity][0]}_fts"
+    found = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table}
+    ).first()
+    return found is not None
+
+
+def _like_ids(entity, model, words, company_id, limit, offset):
+    table, pk, columns = ENTITIES[entity]
+    id_col = getattr(model, pk)
+    query = db.session.query(id_col).filter(model.company_id == company_id)
+    for word in words:
+        pattern = '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        query = query.filter(or_(*[getattr(model, c).ilike(pattern, escape='\\') for c in columns]))
+    rows = query.order_by(model.name, id_col).limit(limit).offset(offset).all()
+    return [(row[0], 0.0) for row in rows]
+
+
+# Ids y puntuación ordenados por relevancia para una página de resultados
+def ranked_ids(entity, model, q, company_id, limit, offset):
+    words = terms(q)
+    if not words:
+        return []
+    params = {'company_id': company_id, 'limit': limit, 'offset': offset}
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        params.update(q=' '.join(words), tsquery=' & '.join(f"{w}:*" for w in words))
+        sql = POSTGRES_SQL[entity]
+    elif dialect == 'sqlite' and _has_fts(entity):
+        params['match'] = ' '.join(f'"{w}"*' for w in words)
+        sql = SQLITE_SQL.format(fts=f"{ENTITIES[entity][0]}_fts")
+    else:
+        return _like_ids(entity, model, words, company_id, limit, offset)
+    return [(row.id, float(row.score)) for row in db.session.execute(text(sql), params)]
+
+
+# Resultados de una entidad: {"items": [...con "score"], "next_offset": N|null}
+def search(entity, model, schema, q, company_id, limit, offset):
+    ranked = ranked_ids(entity, model, q, company_id, limit + 1, offset)
+    next_offset = offset + limit if len(ranked) > limit else None
+    ranked = ranked[:limit]
+
+    id_col = getattr(model, ENTITIES[entity][1])
+    objects = {getattr(obj, id_col.key): obj
+               for obj in model.query.filter(id_col.in_([pk for pk, _ in ranked])).all()} if ranked else {}
+    items = []
+    for pk, score in ranked:
+        obj = objects.get(pk)
+        if obj is not None:
+            item = schema.dump(obj, many=False)
+            item['score'] = round(score, 4)
+            items.append(item)
+    return {'items': items, 'next_offset': next_offset}
@@ -0,0 +1,121 @@
+import itertools
+
+from flask import current_app
+from marshmallow import fields, missing
+
+from app.metrics import serializing
+
+_counter = itertools.count()
+
+
+def _identity_serialize(field_class):
+    return field_class._serialize is fields.Field._serialize
+
+
+# Expresión Python equivalente a field._serialize(v) para los tipos que usan
+# los esquemas automáticos; None si hay que delegar en marshmallow.
+def _fast_expression(field, var, namespace, depth):
+    cls = type(field)
+    if cls._serialize is fields.String._serialize:
+        return f"None if {var} is None else str({var})"
+    if isinstance(field, fields.Number) and cls._serialize is fields.Number._serialize and not field.as_string:
+        if cls._format_num is not fields.Number._format_num:
+            return None
+        name = f"num{next(_counter)}"
+        namespace[name] = field.num_type
+        return f"None if {var} is None else {name}({var})"
+    if isinstance(field, fields.DateTime) and cls._serialize is fields.DateTime._serialize:
+        data_format = field.format or field.DEFAULT_FORMAT
+        if data_format not in ('iso', 'iso8601'):
+            return None
+        return f"None if {var} is None else {var}.isoformat()"
+    if cls is fields.Nested:
+        nested = compile_schema(field.schema, namespace, depth + 1)
+        if nested is None:
+            return None
+        if field.many:
+            return f"None if {var} is None else [{nested}(x) for x in {var}]"
+        return f"None if {var} is None else {nested}({var})"
+    if _identity_serialize(cls):
+        return var
+    return None
+
+
+def _has_dump_hooks(schema):
+    for key, hooks in schema._hooks.items():
+        tag = key[0] if isinstance(key, tuple) else key
+        if tag in ('pre_dump', 'post_dump') and hooks:
+            return True
+    return False
+
+
+# Genera (exec) una función objeto -> dict con una línea por campo; produce el
+# mismo resultado que schema.dump(obj) para los tipos soportados y delega en
+# field.serialize para el resto. Devuelve el nombre de la función en `namespace`.
+def compile_schema(schema, namespace=None, depth=0):
+    if namespace is None:
+        namespace = {}
+    if _has_dump_hooks(schema) or depth > 3:
+        return None
+
+    fn_name = f"dump_{type(schema).__name__}_{next(_counter)}"
+    body = []
+    items = []
+    optional = []
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        attribute = field.attribute or name
+        key = field.data_key if field.data_key is not None else name
+        var = f"v{index}"
+        expression = None
+        if attribute.isidentifier() and field._CHECK_ATTRIBUTE and field.dump_default is missing:
+            expression = _fast_expression(field, var, namespace, depth)
+        if expression is not None:
+            body.append(f"    {var} = obj.{attribute}")
+            items.append(f"        {key!r}: {expression},")
+        else:
+            field_name = f"field{next(_counter)}"
+            namespace[field_name] = field
+            body.append(f"    {var} = {field_name}.serialize({name!r}, obj)")
+            items.append(f"        {key!r}: {var},")
+            optional.append((var, key))
+
+    source = [f"def {fn_name}(obj):", *body, "    out = {", *items, "    }"]
+    for var, key in optional:
+        source.append(f"    if {var} is _missing:")
+        source.append(f"        del out[{key!r}]")
+    source.append("    return out")
+
+    namespace['_missing'] = missing
+    exec('\n'.join(source), namespace)
+    return fn_name
+
+
+# Envoltorio compatible con los esquemas de flask-marshmallow (dump/jsonify)
+# que usa la función compilada; el resto de atributos se delegan al esquema.
+class CompiledSchema:
+    def __init__(self, schema):
+        self.schema = schema
+        self.many = schema.many
+        self._dump_one = None
+
+    def _compiled(self):
+        if self._dump_one is None:
+            namespace = {}
+            fn_name = compile_schema(self.schema, namespace)
+            self._dump_one = namespace[fn_name] if fn_name else (lambda obj: self.schema.dump(obj, many=False))
+        return self._dump_one
+
+    def dump(self, obj, *, many=None):
+        many = self.many if many is None else many
+        dump_one = self._compiled()
+        with serializing():
+            if many:
+                return [dump_one(item) for item in obj]
+            return dump_one(obj)
+
+    def jsonify(self, obj, *args, many=None, **kwargs):
+        data = self.dump(obj, many=many)
+        return current_app.json.response(data, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.schema, name)
@@ -0,0 +1,12 @@
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Se emite después del commit de un cambio en datos de una empresa.
+# sender: entidad ('product', 'category', ...); kwargs: company_id, ids, action
+# ('create' | 'update' | 'delete') y, para productos, category_ids afectadas.
+data_changed = _signals.signal('data-changed')
+
+
+def notify_change(entity, company_id, ids, action, **extra):
+    data_changed.send(entity, company_id=company_id, ids=list(ids), action=action, **extra)
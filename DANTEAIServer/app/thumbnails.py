@@ -0,0 +1,114 @@
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+_SAVE_FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.gif': 'GIF', '.webp': 'WEBP'}
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_pending = set()
+_pil = None
+
+
+# Pillow se importa la primera vez que hace falta (no al arrancar el worker)
+def _load_pil():
+    global _pil
+    if _pil is None:
+        try:
+            from PIL import Image, ImageOps
+            _pil = (Image, ImageOps)
+        except ImportError:  # Pillow es opcional: sin él se sirven siempre los originales
+            _pil = False
+    return _pil
+
+
+def available():
+    return bool(_load_pil())
+
+
+def variant_sizes():
+    return current_app.config['IMAGE_VARIANT_SIZES']
+
+
+def variant_name(filename, size, webp=False):
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_{size}{'.webp' if webp else ext}"
+
+
+# Tamaño fijo más pequeño que cubre el pedido; None si hace falta el original
+def pick_size(requested):
+    for size in sorted(variant_sizes()):
+        if size >= requested:
+            return size
+    return None
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=current_app.config['IMAGE_VARIANT_WORKERS'],
+                                           thread_name_prefix='thumbnails')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _write_atomic(image, path, fmt, quality):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.variant-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            image.save(out, format=fmt, quality=quality)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_variants(folder, filename, sizes, quality=80):
+    ext = os.path.splitext(filename)[1].lower()
+    Image, ImageOps = _load_pil()
+    try:
+        with Image.open(os.path.join(folder, filename)) as source:
+            source = ImageOps.exif_transpose(source)
+            for size in sizes:
+                targets = [(variant_name(filename, size), _SAVE_FORMATS[ext]),
+                           (variant_name(filename, size, webp=True), 'WEBP')]
+                targets = [(name, fmt) for name, fmt in dict(targets).items()
+                           if not os.path.exists(os.path.join(folder, name))]
+                if not targets:
+                    continue
+                thumb = source.copy()
+                thumb.thumbnail((size, size))
+                for name, fmt in targets:
+                    image = thumb
+                    if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+                        image = image.convert('RGB')
+                    _write_atomic(image, os.path.join(folder, name), fmt, quality)
+    except Exception as e:
+        logger.warning("No se pudieron generar las miniaturas de %s: %s", filename, e)
+    finally:
+        with _lock:
+            _pending.discard((folder, filename))
+
+
+# Encola la generación de variantes en segundo plano (idempotente)
+def schedule_variants(folder, filename):
+    if not available() or os.path.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS:
+        return False
+    key = (folder, filename)
+    with _lock:
+        if key in _pending:
+            return True
+        _pending.add(key)
+    _get_executor().submit(build_variants, folder, filename, tuple(variant_sizes()),
+                           current_app.config['IMAGE_VARIANT_QUALITY'])
+    return True
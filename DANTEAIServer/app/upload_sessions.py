@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import current_app
+
+from app.media import media_folder, store_file, max_upload_bytes, UploadTooLarge, CHUNK_SIZE
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre peticiones concurrentes del mismo upload
+    fcntl = None
+
+SESSION_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadSessionError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.offset = offset
+
+
+def _sessions_folder():
+    folder = os.path.join(media_folder(), '.sessions')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _paths(upload_id):
+    if not SESSION_ID.match(upload_id or ''):
+        raise UploadSessionError("Subida no encontrada", 404)
+    folder = _sessions_folder()
+    return os.path.join(folder, f"{upload_id}.json"), os.path.join(folder, f"{upload_id}.part")
+
+
+def _prune(folder):
+    ttl = current_app.config['UPLOAD_SESSION_TTL']
+    limit = time.time() - ttl
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        try:
+            if os.path.getmtime(path) < limit:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def create_session(filename, size):
+    if not filename or not isinstance(size, int) or size <= 0:
+        raise UploadSessionError("filename y size son requeridos")
+    max_bytes = max_upload_bytes(filename)
+    if size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+    folder = _sessions_folder()
+    _prune(folder)
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(upload_id)
+    with open(meta_path, 'w') as meta:
+        json.dump({'filename': filename, 'size': size}, meta)
+    open(part_path, 'wb').close()
+    return {'upload_id': upload_id, 'offset': 0, 'size': size}
+
+
+def _load(upload_id):
+    meta_path, part_path = _paths(upload_id)
+    if not os.path.exists(meta_path) or not os.path.exists(part_path):
+        raise UploadSessionError("Subida no encontrada", 404)
+    with open(meta_path) as meta:
+        return json.load(meta), meta_path, part_path
+
+
+def session_status(upload_id):
+    meta, _, part_path = _load(upload_id)
+    return {'upload_id': upload_id, 'offset': os.path.getsize(part_path), 'size': meta['size']}
+
+
+@contextmanager
+def _locked(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+# Añade un bloque en la posición `offset`; si no coincide con lo ya recibido
+# responde 409 con el offset real para que el cliente reanude desde ahí.
+def append_chunk(upload_id, offset, stream):
+    meta, meta_path, part_path = _load(upload_id)
+    with open(part_path, 'ab') as part, _locked(part):
+        current = part.seek(0, os.SEEK_END)
+        if offset != current:
+            raise UploadSessionError("Offset no coincide", 409, offset=current)
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if current + len(chunk) > meta['size']:
+                raise UploadSessionError("El bloque excede el tamaño declarado", 400, offset=current)
+            part.write(chunk)
+            current += len(chunk)
+        part.flush()
+
+    result = {'upload_id': upload_id, 'offset': current, 'size': meta['size']}
+    if current == meta['size']:
+        result['filename'] = store_file(part_path, meta['filename'])
+        os.remove(meta_path)
+    return result
+
+
+def cancel_session(upload_id):
+    meta_path, part_path = _paths(upload_id)
+    for path in (meta_path, part_path):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,6 @@
+from app.asgi import AsgiApp
+from index import app
+
+# Punto de entrada ASGI: `uvicorn asgi:application --workers 4` (requiere
+# aiosqlite o psycopg 3 para las vistas async; ver app/asgi.py).
+application = AsgiApp(app)
@@ -0,0 +1,115 @@
+# Compara el modo WSGI (app Flask en un pool de hilos, como un servidor
+# threaded) con el modo ASGI (app/asgi.py) lanzando las mismas peticiones con
+# N clientes concurrentes. Con SQLite local apenas hay espera de E/S; contra
+# Postgres (DATABASE_URL=postgresql://...) se ve lo que aporta no ocupar un
+# hilo por petición en curso.
+#
+#   cd DANTEAIServer && python -m benchmarks.bench_asgi [concurrencia] [peticiones]
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_DB_FILE = os.path.join(tempfile.gettempdir(), 'dante_bench_asgi.db')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{_DB_FILE}")  # el engine async necesita un fichero
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+from index import app
+from app.asgi import AsgiApp
+from benchmarks.check_query_counts import seed
+
+URLS = (
+    '/api/products?company_id=c0&limit=50',
+    '/api/clients?company_id=c0&limit=50',
+    '/api/support/tickets?limit=50',
+    '/api/messages/u0?other_user_id=u1&limit=50',
+    '/api/messages/inbox?user_id=u0',
+)
+
+
+def _summary(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<6}{len(latencies) / elapsed:>10.0f}{statistics.median(latencies) * 1000:>10.1f}ms"
+          f"{p99 * 1000:>9.1f}ms")
+
+
+def run_wsgi(concurrency, total):
+    client = app.test_client()
+
+    def one(i):
+        started = time.perf_counter()
+        response = client.get(URLS[i % len(URLS)])
+        response.get_data()
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(one, range(total)))
+    return latencies, time.perf_counter() - started
+
+
+async def _asgi_get(application, url):
+    path, _, query = url.partition('?')
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+             'headers': [(b'host', b'localhost')], 'http_version': '1.1', 'scheme': 'http',
+             'server': ('localhost', 80), 'client': ('127.0.0.1', 0), 'root_path': ''}
+    sent = asyncio.Event()
+    status = []
+
+    async def receive():
+        if sent.is_set():
+            await asyncio.Event().wait()  # sin desconexión: el cuerpo se envía completo
+        sent.set()
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(scope, receive, send)
+    return status[0]
+
+
+async def _run_asgi(application, concurrency, total):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            status = await _asgi_get(application, URLS[i % len(URLS)])
+            assert status == 200, status
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, time.perf_counter() - started
+
+
+def run_asgi(concurrency, total):
+    return asyncio.run(_run_asgi(AsgiApp(app), concurrency, total))
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    app.config['CATALOG_CACHE_ENABLED'] = False
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1'
+    with app.app_context():
+        seed(50)
+    # Mismo número de hilos para el modo WSGI que para el puente del modo ASGI
+    threads = min(concurrency, app.config['ASGI_WSGI_THREADS'])
+
+    print(f"concurrencia={concurrency} peticiones={total} hilos WSGI={threads}")
+    print(f"{'modo':<6}{'req/s':>10}{'p50':>12}{'p99':>11}")
+    _summary('wsgi', *run_wsgi(threads, total))
+    _summary('asgi', *run_asgi(concurrency, total))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# Banco de carga reproducible sobre las rutas reales: genera una empresa
+# sintética con benchmarks.datagen (misma semilla -> mismos datos) y lanza
+# cada escenario con el cliente de pruebas de Flask desde N hilos. Informa
+# peticiones/s, p50, p99 y consultas SQL por petición. Por defecto usa SQLite
+# en un fichero temporal; con DATABASE_URL apunta a un Postgres local
+# (se borra y regenera, por eso exige --reset).
+#
+#   cd DANTEAIServer && python -m benchmarks.bench_endpoints --requests 300 --concurrency 8
+#   python -m benchmarks.bench_endpoints --json antes.json
+#   python -m benchmarks.bench_endpoints --baseline antes.json --only products_page,inbox
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_DB_FILE = os.path.join(tempfile.gettempdir(), 'dante_bench_endpoints.db')
+_DEFAULT_DB = 'DATABASE_URL' not in os.environ
+if _DEFAULT_DB:
+    os.environ['DATABASE_URL'] = f"sqlite:///{_DB_FILE}"
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+from sqlalchemy import event
+from index import app, db
+from benchmarks import datagen
+
+
+# (nombre, método, URL, cuerpo JSON) a partir de los ids del manifiesto
+def scenarios(company):
+    c = company['id']
+    u0, u1 = company['users'][0], company['users'][1]
+    term = company['term']
+    return [
+        ('products_page', 'GET', f"/api/products?company_id={c}&limit=50", None),
+        ('products_all', 'GET', f"/api/products?company_id={c}", None),
+        ('products_ndjson', 'GET', f"/api/products?company_id={c}&stream=ndjson", None),
+        ('product_detail', 'GET', f"/api/product/{company['products'][0]}", None),
+        ('products_top', 'GET', f"/api/products/top?company_id={c}&window=7d", None),
+        ('categories', 'GET', f"/api/categories?company_id={c}&typeon=1", None),
+        ('clients_page', 'GET', f"/api/clients?company_id={c}&limit=50", None),
+        ('tickets_page', 'GET', "/api/support/tickets?limit=50", None),
+        ('conversation', 'GET', f"/api/messages/{u0}?other_user_id={u1}&limit=50", None),
+        ('inbox', 'GET', f"/api/messages/inbox?user_id={u0}", None),
+        ('search', 'GET', f"/api/search?company_id={c}&q={term}", None),
+        ('company_stats', 'GET', f"/api/companies/{c}/stats", None),
+        ('assistant_context', 'GET', f"/api/assistant/context?company_id={c}&q={term}", None),
+        ('send_message', 'POST', "/api/messages", {'sender_id': u1, 'receiver_id': u0, 'content': 'hola'}),
+    ]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self._lock:
+            self.count += 1
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_scenario(method, url, body, requests, concurrency, queries):
+    local = threading.local()
+
+    def one(_):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body)
+        response.get_data()
+        response.close()  # cierra los streams (sesión del generador NDJSON) antes de la siguiente
+        elapsed = time.perf_counter() - started
+        assert response.status_code < 400, (url, response.status_code)
+        return elapsed
+
+    for i in range(min(10, requests)):  # calentamiento: caché de catálogo, compilación de esquemas
+        one(i)
+    before = queries.count
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': requests / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'queries': (queries.count - before) / requests,
+    }
+
+
+def _delta(current, previous):
+    if not previous:
+        return ''
+    return f"{(current - previous) / previous * 100:+.0f}%"
+
+
+def report(results, baseline=None):
+    baseline = baseline or {}
+    print(f"{'escenario':<19}{'req/s':>9}{'p50':>10}{'p99':>10}{'sql':>6}  {'Δ req/s':>8}{'Δ p50':>8}{'Δ p99':>8}")
+    for name, r in results.items():
+        b = baseline.get(name, {})
+        print(f"{name:<19}{r['rps']:>9.0f}{r['p50_ms']:>8.1f}ms{r['p99_ms']:>8.1f}ms{r['queries']:>6.1f}  "
+              f"{_delta(r['rps'], b.get('rps')):>8}{_delta(r['p50_ms'], b.get('p50_ms')):>8}"
+              f"{_delta(r['p99_ms'], b.get('p99_ms')):>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de carga sobre las rutas de la API")
+    datagen.add_size_arguments(parser)
+    parser.add_argument('--requests', type=int, default=200, help="peticiones por escenario")
+    parser.add_argument('--concurrency', type=int, default=4, help="hilos cliente")
+    parser.add_argument('--only', help="escenarios separados por comas")
+    parser.add_argument('--cache', action='store_true', help="deja activa la caché de catálogo")
+    parser.add_argument('--reset', action='store_true', help="necesario con DATABASE_URL: borra esa base")
+    parser.add_argument('--json', help="guarda los resultados en este fichero")
+    parser.add_argument('--baseline', help="compara con un JSON guardado antes con --json")
+    args = parser.parse_args(argv)
+
+    if not _DEFAULT_DB and not args.reset:
+        parser.error("DATABASE_URL está definida: añade --reset para borrar y regenerar esa base")
+    app.config['CATALOG_CACHE_ENABLED'] = args.cache
+    app.config['METRICS_SLOW_REQUEST_MS'] = 0
+
+    with app.app_context():
+        datagen.reset_database()
+        manifest = datagen.generate(args.companies, args.seed, **datagen.sizes_from_args(args))
+        selected = set(args.only.split(',')) if args.only else None
+        queries = QueryCounter()
+        event.listen(db.engine, 'before_cursor_execute', queries)
+
+        print(f"{db.engine.dialect.name}  semilla={args.seed}  {manifest['sizes']}  "
+              f"peticiones={args.requests}  concurrencia={args.concurrency}")
+        results = {}
+        for name, method, url, body in scenarios(manifest['companies'][0]):
+            if selected and name not in selected:
+                continue
+            results[name] = run_scenario(method, url, body, args.requests, args.concurrency, queries)
+        event.remove(db.engine, 'before_cursor_execute', queries)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as source:
+            baseline = json.load(source)['results']
+    report(results, baseline)
+    if args.json:
+        with open(args.json, 'w') as target:
+            json.dump({'seed': args.seed, 'sizes': manifest['sizes'], 'requests': args.requests,
+                       'concurrency': args.concurrency, 'results': results}, target, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
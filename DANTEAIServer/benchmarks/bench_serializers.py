@@ -0,0 +1,83 @@
+# Compara los esquemas marshmallow con la versión compilada (app/serialization.py)
+# sobre listas de 1k/10k/100k filas y verifica que el JSON sea idéntico byte a byte.
+#
+#   cd DANTEAIServer && python -m benchmarks.bench_serializers [1000 10000 100000]
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+from index import app
+from models.model_user import User
+from models.model_product import Product
+from models.model_client import Client
+from models.model_message import Message
+from models.model_ticket import SupportTicket
+from models.all_schemas import (
+    ProductSchema, ClientSchema, MessageSchema, SupportTicketSchema,
+    products_schema, clients_schema, messages_schema, support_tickets_schema,
+)
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+
+def build_rows(n):
+    now = datetime(2024, 1, 1)
+    users = [_transient(User, id_user=f"u{i}", name=f"Usuario {i}", email=f"u{i}@demo.com",
+                        avatar_url=None, phone="555") for i in range(50)]
+
+    products = [_transient(Product, id_product=f"p{i}", name=f"Producto {i}", description="Descripción",
+                           price=i * 1.25, stock=i % 100, image=None, is_active=i % 7 != 0,
+                           category_id="cat", company_id="c", created_at=now + timedelta(seconds=i),
+                           updated_at=now) for i in range(n)]
+    clients = [_transient(Client, id=f"cl{i}", company_id="c", category_id="cat", name=f"Cliente {i}",
+                          email=f"c{i}@demo.com", phone="555", address="Calle 1", document_type="DNI",
+                          document_number=str(i), avatar=None, is_active=True,
+                          created_at=now + timedelta(seconds=i), updated_at=None) for i in range(n)]
+    messages = [_transient(Message, id=f"m{i}", sender_id=users[i % 50].id_user, receiver_id=users[(i + 1) % 50].id_user,
+                           sender=users[i % 50], receiver=users[(i + 1) % 50], content=f"Mensaje {i}",
+                           is_read=bool(i % 2), created_at=now + timedelta(seconds=i)) for i in range(n)]
+    tickets = [_transient(SupportTicket, id=f"t{i}", subject=f"Asunto {i}", description="Detalle", status="Abierto",
+                          user_id=users[i % 50].id_user, user=users[i % 50],
+                          created_at=now + timedelta(seconds=i), updated_at=None) for i in range(n)]
+    return {'products': products, 'clients': clients, 'messages': messages, 'tickets': tickets}
+
+
+# Instancia ORM transitoria sin pasar por __init__ (User hashea la contraseña)
+def _transient(model, **values):
+    obj = model.__new__(model)
+    model._sa_class_manager._new_state_if_none(obj)
+    for key, value in values.items():
+        setattr(obj, key, value)
+    return obj
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def run(sizes=DEFAULT_SIZES):
+    pairs = {
+        'products': (ProductSchema(many=True), products_schema),
+        'clients': (ClientSchema(many=True), clients_schema),
+        'messages': (MessageSchema(many=True), messages_schema),
+        'tickets': (SupportTicketSchema(many=True), support_tickets_schema),
+    }
+    with app.app_context():
+        print(f"{'esquema':<10}{'filas':>8}{'marshmallow':>14}{'compilado':>12}{'x':>7}")
+        for n in sizes:
+            rows = build_rows(n)
+            for name, (reference, compiled) in pairs.items():
+                expected, t_ref = _timed(lambda: reference.jsonify(rows[name]).get_data())
+                actual, t_fast = _timed(lambda: compiled.jsonify(rows[name]).get_data())
+                assert actual == expected, f"{name}: la salida compilada difiere"
+                print(f"{name:<10}{n:>8}{t_ref:>13.3f}s{t_fast:>11.3f}s{t_ref / t_fast:>6.1f}x")
+
+
+if __name__ == '__main__':
+    run([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,71 @@
+# Mide el arranque de un worker: importar la fábrica, crear la app y atender la
+# primera petición, cada uno en un proceso nuevo; además lista los módulos más
+# caros según `python -X importtime`.
+#
+#   cd DANTEAIServer && python -m benchmarks.bench_startup [repeticiones]
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+from app.factory import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+app.test_client().get('/api/system/stats')
+t3 = time.perf_counter()
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'first_request': t3 - t2, 'total': t3 - t0}))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite://')
+    env.setdefault('PASSWORD_HASH_WORKERS', '0')
+    return env
+
+
+def measure(runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', PROBE], cwd=BASE_DIR, env=_env(),
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return samples
+
+
+def import_profile(top=15):
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'from app.factory import create_app; create_app()'],
+                         cwd=BASE_DIR, env=_env(), capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # "import time:  self [us] | cumulative | módulo"
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = measure(runs)
+    print(f"{'fase':<15}{'mediana':>10}{'mín':>10}{'máx':>10}")
+    for phase in ('import', 'create_app', 'first_request', 'total'):
+        values = [s[phase] * 1000 for s in samples]
+        print(f"{phase:<15}{statistics.median(values):>9.1f}ms{min(values):>8.1f}ms{max(values):>8.1f}ms")
+
+    print("\nMódulos más caros (acumulado, ms):")
+    for cumulative, self_us, name in import_profile():
+        print(f"  {cumulative / 1000:>8.1f} {self_us / 1000:>8.1f}  {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
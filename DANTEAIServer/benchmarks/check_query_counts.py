@@ -0,0 +1,102 @@
+# Guardia contra N+1: ejecuta cada listado con N y 4N filas y falla si el número
+# de consultas SQL crece con las filas.
+#
+#   cd DANTEAIServer && python -m benchmarks.check_query_counts
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+from sqlalchemy import event
+from index import app, db
+from models.model_company import Company
+from models.model_category import Category
+from models.model_product import Product
+from models.model_client import Client
+from models.model_user import User
+from models.model_ticket import SupportTicket
+
+ENDPOINTS = (
+    '/api/products?company_id=c0',
+    '/api/products?company_id=c0&limit=500',
+    '/api/clients?company_id=c0',
+    '/api/categories?company_id=c0&typeon=1',
+    '/api/support/tickets',
+    '/api/support/tickets?limit=500',
+    '/api/support/tickets?stream=ndjson',
+    '/api/messages/u0?other_user_id=u1',
+    '/api/messages/inbox?user_id=u0',
+)
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed(rows):
+    db.drop_all()
+    db.create_all()
+    db.session.add(Company(id_company='c0', name='Demo', email='demo@demo.com', phone=None,
+                           company_name=None, rif=None, address=None, password='demo'))
+    users = [User(id_user=f"u{i}", name=f"Usuario {i}", email=f"u{i}@demo.com", password='x', company_id='c0')
+             for i in range(rows)]
+    db.session.add_all(users)
+    db.session.add_all(Category(id_category=f"cat{i}", typeon=1, name=f"Categoria {i}", company_id='c0')
+                       for i in range(rows))
+    db.session.flush()
+    db.session.add_all(Product(id_product=f"p{i}", name=f"Producto {i}", price=1.0, stock=i,
+                               category_id=f"cat{i}", company_id='c0') for i in range(rows))
+    db.session.add_all(Client(id=str(uuid.uuid4()), company_id='c0', category_id=f"cat{i}", name=f"Cliente {i}",
+                              email=f"c{i}@demo.com") for i in range(rows))
+    db.session.add_all(SupportTicket(subject=f"Ticket {i}", description='-', user_id=f"u{i}") for i in range(rows))
+    db.session.commit()
+
+    client = app.test_client()
+    for i in range(1, rows):
+        client.post('/api/messages', json={'sender_id': f"u{i}", 'receiver_id': 'u0', 'content': 'hola'})
+        client.post('/api/messages', json={'sender_id': 'u0', 'receiver_id': 'u1', 'content': f"m{i}"})
+
+
+def measure(rows):
+    seed(rows)
+    client = app.test_client()
+    counts = {}
+    for url in ENDPOINTS:
+        db.session.remove()
+        with count_queries() as statements:
+            response = client.get(url)
+            response.get_data()
+        assert response.status_code == 200, (url, response.status_code)
+        counts[url] = len(statements)
+    return counts
+
+
+def main(rows=10):
+    app.config['CATALOG_CACHE_ENABLED'] = False
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1'
+    with app.app_context():
+        small = measure(rows)
+        large = measure(rows * 4)
+    failed = False
+    for url in ENDPOINTS:
+        status = 'ok' if small[url] == large[url] else 'N+1'
+        failed |= status != 'ok'
+        print(f"{status:<4} {small[url]:>3} -> {large[url]:>3}  {url}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
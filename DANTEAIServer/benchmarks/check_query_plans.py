@@ -0,0 +1,108 @@
+# Comprueba con EXPLAIN que las consultas de los listados usan los índices de
+# app/migrations.py (SQLite con EXPLAIN QUERY PLAN, Postgres con EXPLAIN JSON).
+#
+#   cd DANTEAIServer && python -m benchmarks.check_query_plans
+#   DATABASE_URL=postgresql://... python -m benchmarks.check_query_plans
+import json
+import os
+import sys
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+from sqlalchemy import text
+from index import app, db
+from app.migrations import upgrade
+from app import search
+from models.model_product import Product
+from models.model_client import Client
+from models.model_category import Category
+from models.model_ticket import SupportTicket
+from models.model_message import Message
+from models.model_conversation import ConversationSummary
+from models.model_product_ranking import ProductScore
+from models.model_retrieval import RetrievalPosting
+
+
+def cases():
+    by_pair = ((Message.sender_id == 'u1') & (Message.receiver_id == 'u2')) | \
+              ((Message.sender_id == 'u2') & (Message.receiver_id == 'u1'))
+    return [
+        ('ix_products_company_created',
+         Product.query.filter_by(company_id='c').order_by(Product.created_at.desc(), Product.id_product.desc())),
+        ('ix_products_category_created',
+         Product.query.filter_by(category_id='cat').order_by(Product.created_at.desc(), Product.id_product.desc())),
+        ('ix_products_company_active_created',
+         Product.query.filter(Product.is_active == db.true(), Product.company_id == 'c')
+         .order_by(Product.created_at.desc()).limit(10)),
+        ('ix_clients_company_created',
+         Client.query.filter_by(company_id='c').order_by(Client.created_at.desc(), Client.id.desc())),
+        ('ix_categories_company_typeon_created',
+         Category.query.filter_by(company_id='c', typeon=1).order_by(Category.created_at.desc())),
+        ('ix_support_tickets_created',
+         SupportTicket.query.order_by(SupportTicket.created_at.desc(), SupportTicket.id.desc()).limit(50)),
+        ('ix_support_tickets_user_status',
+         SupportTicket.query.filter_by(user_id='u1', status='Abierto')),
+        ('ix_messages_sender_receiver_created',
+         Message.query.filter(by_pair).order_by(Message.created_at.asc())),
+        ('ix_messages_sender_receiver_created',
+         Message.query.filter(Message.sender_id == 'u1', Message.receiver_id == 'u2', Message.is_read == db.false())),
+        ('ix_conversation_summaries_owner_last',
+         ConversationSummary.query.filter_by(owner_id='u1')
+         .order_by(ConversationSummary.last_message_at.desc(), ConversationSummary.id.desc())),
+        ('ix_product_scores_company_7d',
+         ProductScore.query.filter(ProductScore.company_id == 'c', ProductScore.units_7d > 0)
+         .order_by(ProductScore.units_7d.desc()).limit(10)),
+        ('ix_retrieval_postings_company_term',
+         RetrievalPosting.query.filter(RetrievalPosting.company_id == 'c',
+                                       RetrievalPosting.term.in_(['martillo', 'acero']))),
+    ] + search_cases()
+
+
+# Búsqueda: índices GIN (tsvector y trigramas) en Postgres, tablas FTS5 en SQLite
+def search_cases():
+    params = {'company_id': 'c', 'limit': 20, 'offset': 0}
+    if db.engine.dialect.name == 'postgresql':
+        params.update(q='lap', tsquery='lap:*')
+        return [
+            ('ix_products_search_tsv', (search.POSTGRES_SQL['products'], params)),
+            ('ix_products_name_trgm', (search.POSTGRES_SQL['products'], params)),
+            ('ix_clients_search_tsv', (search.POSTGRES_SQL['clients'], params)),
+            ('ix_clients_search_trgm', (search.POSTGRES_SQL['clients'], params)),
+        ]
+    params['match'] = '"lap"*'
+    return [(f"{table}_fts", (search.SQLITE_SQL.format(fts=f"{table}_fts"), params))
+            for table in ('products', 'clients')]
+
+
+def explain(query):
+    if isinstance(query, tuple):
+        sql, params = query
+    else:
+        sql, params = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})), {}
+    if db.engine.dialect.name == 'postgresql':
+        # Con tablas casi vacías Postgres prefiere seq scan; se desactiva para ver si el índice es usable
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+        return json.dumps(plan)
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def main():
+    failed = False
+    with app.app_context():
+        upgrade()
+        for index_name, query in cases():
+            plan = explain(query)
+            ok = index_name in plan
+            failed |= not ok
+            print(f"{'ok' if ok else 'FALTA':<6} {index_name}")
+            if not ok:
+                print('       ' + plan.replace('\n', '\n       '))
+        db.session.rollback()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# Generador de empresas sintéticas reproducible: con la misma semilla y los
+# mismos tamaños produce exactamente los mismos ids, textos y fechas. Inserta
+# en bloque (sin pasar por las rutas) y reconstruye las tablas derivadas:
+# resúmenes de conversación, índice del asistente y ranking de productos.
+#
+#   cd DANTEAIServer && python -m benchmarks.datagen --companies 2 --products 5000 --seed 7
+#   DATABASE_URL=postgresql://... python -m benchmarks.datagen --reset
+import argparse
+import os
+import random
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+
+from flask import current_app
+from sqlalchemy import insert, text
+from index import app, db
+from app import inbox, retrieval
+from app.hashing import hash_password
+from app.migrations import MIGRATIONS_TABLE, upgrade
+from models.model_company import Company
+from models.model_user import User
+from models.model_category import Category
+from models.model_product import Product
+from models.model_client import Client
+from models.model_ticket import SupportTicket
+from models.model_message import Message
+from models.model_product_ranking import ProductScore, RankingState
+
+DEFAULT_SIZES = {
+    'users': 20,
+    'categories': 10,
+    'products': 500,
+    'clients': 200,
+    'tickets': 50,
+    'messages': 2000,
+}
+PASSWORD = 'demo1234'  # contraseña de todas las empresas y usuarios generados
+BASE_TIME = datetime(2024, 1, 1)
+BATCH_SIZE = 1000
+SAMPLE_SIZE = 10  # ids de cada tipo que se devuelven para construir URLs
+
+WORDS = (
+    'acero', 'martillo', 'tornillo', 'cable', 'pintura', 'lámpara', 'tubo', 'madera', 'cemento', 'llave',
+    'bomba', 'filtro', 'sensor', 'batería', 'cargador', 'monitor', 'teclado', 'silla', 'mesa', 'papel',
+    'rojo', 'azul', 'grande', 'pequeño', 'industrial', 'premium', 'básico', 'reforzado', 'digital', 'eco',
+)
+FIRST_NAMES = ('Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Jorge', 'Elena', 'Pedro', 'Sofía', 'Diego')
+LAST_NAMES = ('García', 'Pérez', 'Rodríguez', 'López', 'Martínez', 'Gómez', 'Díaz', 'Torres', 'Rojas', 'Vargas')
+TICKET_STATUSES = ('Abierto', 'En Progreso', 'Cerrado')
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _phrase(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+# Borra todas las tablas (incluidas las FTS de SQLite y el registro de
+# migraciones) y vuelve a aplicar las migraciones sobre la base vacía.
+def reset_database():
+    db.session.remove()
+    db.drop_all()
+    with db.engine.begin() as connection:
+        for table in (MIGRATIONS_TABLE, 'products_fts', 'clients_fts'):
+            connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    upgrade()
+
+
+def _company_rows(rng, index, password_hash, sizes):
+    company_id = _uuid(rng)
+    prefix = f"c{index}"
+    tick = iter(range(10 ** 9))
+
+    def created():
+        return BASE_TIME + timedelta(minutes=next(tick))
+
+    rows = {'company': [{
+        'id_company': company_id, 'name': f"Empresa {index}", 'email': f"{prefix}@bench.local",
+        'phone': '555-0000', 'company_name': f"Empresa Sintética {index} C.A.", 'rif': f"J-{index:08d}",
+        'address': f"Calle {index}", 'password_hash': password_hash,
+    }]}
+    rows['users'] = [{
+        'id_user': _uuid(rng), 'name': _person(rng), 'email': f"{prefix}.u{i}@bench.local", 'phone': '555-0001',
+        'password_hash': password_hash, 'role': 'Administrador' if i == 0 else 'Usuario',
+        'company_id': company_id, 'is_active': True, 'is_verified': True,
+        'created_at': created(), 'updated_at': BASE_TIME,
+    } for i in range(sizes['users'])]
+    rows['categories'] = [{
+        'id_category': _uuid(rng), 'typeon': 1 if i % 2 == 0 else 2, 'name': f"{prefix} {_phrase(rng, 2)} {i}",
+        'description': _phrase(rng, 6), 'company_id': company_id, 'created_at': created(), 'updated_at': BASE_TIME,
+    } for i in range(sizes['categories'])]
+    product_categories = [c['id_category'] for c in rows['categories'] if c['typeon'] == 1] \
+        or [c['id_category'] for c in rows['categories']]
+    client_categories = [c['id_category'] for c in rows['categories'] if c['typeon'] == 2] or product_categories
+    rows['products'] = [{
+        'id_product': _uuid(rng), 'name': f"{_phrase(rng, 3)} {i}", 'description': _phrase(rng, 12),
+        'price': round(rng.uniform(1, 500), 2), 'stock': rng.randint(0, 200), 'is_active': rng.random() > 0.1,
+        'category_id': rng.choice(product_categories), 'company_id': company_id,
+        'created_at': created(), 'updated_at': BASE_TIME, 'version': 1,
+    } for i in range(sizes['products'])] if product_categories else []
+    rows['clients'] = [{
+        'id': _uuid(rng), 'company_id': company_id, 'category_id': rng.choice(client_categories),
+        'name': _person(rng), 'email': f"{prefix}.cl{i}@bench.local", 'phone': f"555-{i:04d}",
+        'address': f"Avenida {_phrase(rng, 1)} {i}", 'document_type': 'RIF', 'document_number': f"{prefix}-{i}",
+        'is_active': True, 'created_at': created(),
+    } for i in range(sizes['clients'])] if client_categories else []
+
+    user_ids = [u['id_user'] for u in rows['users']]
+    rows['tickets'] = [{
+        'id': _uuid(rng), 'subject': _phrase(rng, 4), 'description': _phrase(rng, 20),
+        'status': rng.choice(TICKET_STATUSES), 'user_id': rng.choice(user_ids), 'created_at': created(),
+    } for _ in range(sizes['tickets'])] if user_ids else []
+    # Conversaciones concentradas en pocos pares, como un chat real
+    rows['messages'] = []
+    if len(user_ids) > 1:
+        pairs = [tuple(rng.sample(user_ids, 2)) for _ in range(max(1, len(user_ids) * 2))]
+        pairs.insert(0, (user_ids[1], user_ids[0]))  # par fijo para las URLs de ejemplo
+        for _ in range(sizes['messages']):
+            sender_id, receiver_id = pairs[min(int(rng.expovariate(0.3)), len(pairs) - 1)]
+            if rng.random() < 0.5:
+                sender_id, receiver_id = receiver_id, sender_id
+            rows['messages'].append({
+                'id': _uuid(rng), 'sender_id': sender_id, 'receiver_id': receiver_id,
+                'content': _phrase(rng, rng.randint(2, 15)), 'is_read': rng.random() < 0.7, 'created_at': created(),
+            })
+    # Ranking: puntuaciones para un 20% de los productos (roll_windows no resta nada hoy)
+    rows['scores'] = []
+    for product in rng.sample(rows['products'], len(rows['products']) // 5):
+        units = rng.randint(1, 50)
+        rows['scores'].append({'product_id': product['id_product'], 'company_id': company_id,
+                               'units_7d': units, 'units_30d': units * 3, 'units_total': units * 10})
+    return rows
+
+
+def _sample(rows, key):
+    return [row[key] for row in rows[:SAMPLE_SIZE]]
+
+
+# Crea `companies` empresas con `sizes` filas de cada tipo por empresa.
+# Devuelve un manifiesto con los ids de ejemplo de cada empresa.
+def generate(companies=1, seed=0, **sizes):
+    sizes = {**DEFAULT_SIZES, **sizes}
+    rng = random.Random(seed)
+    password_hash = hash_password(PASSWORD)
+    manifest = {'seed': seed, 'sizes': sizes, 'password': PASSWORD, 'companies': []}
+
+    for index in range(companies):
+        rows = _company_rows(rng, index, password_hash, sizes)
+        company_id = rows['company'][0]['id_company']
+        for model, key in ((Company, 'company'), (User, 'users'), (Category, 'categories'), (Product, 'products'),
+                           (Client, 'clients'), (SupportTicket, 'tickets'), (Message, 'messages'),
+                           (ProductScore, 'scores')):
+            _insert(model, rows[key])
+        _insert(RankingState, [{'company_id': company_id, 'rolled_on': date.today()}])
+        db.session.commit()
+        manifest['companies'].append({
+            'id': company_id,
+            'email': rows['company'][0]['email'],
+            'users': _sample(rows['users'], 'id_user'),
+            'user_emails': _sample(rows['users'], 'email'),
+            'categories': _sample(rows['categories'], 'id_category'),
+            'products': _sample(rows['products'], 'id_product'),
+            'clients': _sample(rows['clients'], 'id'),
+            'tickets': _sample(rows['tickets'], 'id'),
+            'term': rows['products'][0]['name'].split()[0].lower() if rows['products'] else WORDS[0],
+        })
+
+    inbox.rebuild_summaries()
+    if current_app.config['ASSISTANT_INDEX_ENABLED']:
+        retrieval.rebuild()
+    return manifest
+
+
+def add_size_arguments(parser):
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--companies', type=int, default=1)
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f"--{name}", type=int, default=default, help=f"por empresa (defecto {default})")
+
+
+def sizes_from_args(args):
+    return {name: getattr(args, name) for name in DEFAULT_SIZES}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera empresas sintéticas reproducibles")
+    add_size_arguments(parser)
+    parser.add_argument('--reset', action='store_true', help="borra y recrea el esquema antes de generar")
+    args = parser.parse_args(argv)
+
+    with app.app_context():
+        if args.reset:
+            reset_database()
+        else:
+            upgrade()
+        manifest = generate(args.companies, args.seed, **sizes_from_args(args))
+    for company in manifest['companies']:
+        print(f"{company['id']}  {company['email']}  (contraseña {PASSWORD})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
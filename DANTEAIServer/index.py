@@ -1,42 +1,24 @@
-
-from flask import Flask
 import os
-from app.extensions import db, ma, jwt
-from app.config import Config  # <-- Importamos la clase
-from flask_cors import CORS
-
-app = Flask(__name__)
-
-# Config DB
-app = Flask(__name__)
-app.config.from_object(Config)
 
-# Vincula la app con las extensiones
-db.init_app(app)
-ma.init_app(app)
-jwt.init_app(app)
-CORS(app)  # tras crear la app
+from app.extensions import db
+from app.factory import create_app
 
-# IMPORTACION DE TODOS LOS MODELOS
-from models.model_user import User
-from models.model_product import Product
-from models.model_company import Company
-from models.model_category import Category
-from models.model_client import Client
-from models.model_ticket import SupportTicket
-from models.model_message import Message
+# Punto de entrada: `python index.py`, `flask --app index run` o un servidor
+# WSGI con `index:app` (también con --preload: los engines se recrean tras el fork).
+# Modo ASGI con vistas async para mensajes, listados e imágenes: `asgi:application`.
+# Solo `python index.py` migra el esquema al arrancar; con gunicorn/uvicorn hay
+# que lanzar antes `flask --app index db-upgrade` o definir MIGRATE_ON_STARTUP=true.
+app = create_app()
 
-from routes.category_routes import *
-from routes.client_routes import *
-from routes.company_routes import *
-from routes.ticket_routes import *
-from routes.message_routes import *
-from routes.user_routes import *
-from routes.product_routes import *
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        from app.migrations import upgrade
+        upgrade()
 
+    # Con el recargador de debug solo el proceso hijo abre el puerto SSE
+    if app.config['REALTIME_ASYNC_PORT'] and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from app.realtime_server import start_in_thread
+        start_in_thread(app, port=int(app.config['REALTIME_ASYNC_PORT']))
 
-    app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0')
@@ -1,5 +1,6 @@
 from app.extensions import ma
 from flask_marshmallow import Marshmallow
+from app.serialization import CompiledSchema
 from models.model_user import User
 from models.model_category import Category
 from models.model_client import Client
@@ -7,6 +8,7 @@ from models.model_company import Company
 from models.model_message import Message
 from models.model_product import Product
 from models.model_ticket import SupportTicket
+from models.model_conversation import ConversationSummary
 
 
 
@@ -47,7 +49,7 @@ class ClientSchema(ma.SQLAlchemyAutoSchema):
     # Añade el campo avatar para incluirlo en la serialización
     avatar = ma.String()
 client_schema = ClientSchema()
-clients_schema = ClientSchema(many=True)
+clients_schema = CompiledSchema(ClientSchema(many=True))
 
 
 class UserSimpleSchema(ma.SQLAlchemyAutoSchema):
@@ -77,11 +79,22 @@ class MessageSchema(ma.SQLAlchemyAutoSchema):
         load_instance = True
         include_fk = True
 
+class ConversationSummarySchema(ma.SQLAlchemyAutoSchema):
+    peer = ma.Nested(MessageUserSchema)
+    last_message = ma.Nested(MessageSchema, exclude=("sender", "receiver"))
+
+    class Meta:
+        model = ConversationSummary
+        include_fk = True
+
+# Las listas grandes usan la versión compilada (mismo JSON, sin recorrer campo a campo)
 message_schema = MessageSchema()
-messages_schema = MessageSchema(many=True)
+messages_schema = CompiledSchema(MessageSchema(many=True))
+
+conversation_summaries_schema = ConversationSummarySchema(many=True)
 
 support_ticket_schema = SupportTicketSchema()
-support_tickets_schema = SupportTicketSchema(many=True)
+support_tickets_schema = CompiledSchema(SupportTicketSchema(many=True))
 
 company_schema = CompanySchema()
 companies_schema = CompanySchema(many=True)
@@ -93,4 +106,4 @@ category_schema = CategorySchema()
 categories_schema = CategorySchema(many=True)
 
 product_schema = ProductSchema()
-products_schema = ProductSchema(many=True)
\ No newline at end of file
+products_schema = CompiledSchema(ProductSchema(many=True))
\ No newline at end of file
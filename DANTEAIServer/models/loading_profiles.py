@@ -0,0 +1,19 @@
+from sqlalchemy.orm import selectinload
+from models.model_category import Category
+from models.model_message import Message
+from models.model_ticket import SupportTicket
+from models.model_conversation import ConversationSummary
+
+# Relaciones que cada listado serializa anidadas. Se cargan con selectinload
+# (una consulta extra por lote, no una por fila) y es compatible con el
+# streaming por lotes de app/pagination.py.
+LOADING_PROFILES = {
+    'categories': (selectinload(Category.company),),
+    'messages': (selectinload(Message.sender), selectinload(Message.receiver)),
+    'tickets': (selectinload(SupportTicket.user),),
+    'inbox': (selectinload(ConversationSummary.peer), selectinload(ConversationSummary.last_message)),
+}
+
+
+def with_profile(query, name):
+    return query.options(*LOADING_PROFILES[name])
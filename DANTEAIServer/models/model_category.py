@@ -3,6 +3,9 @@ from datetime import datetime
 
 class Category(db.Model):
     __tablename__ = 'categories'
+    __table_args__ = (
+        db.Index('ix_categories_company_typeon_created', 'company_id', 'typeon', 'created_at', 'id_category'),
+    )
     id_category = db.Column(db.String, primary_key=True)
     typeon = db.Column(db.Integer, nullable=False) 
     name = db.Column(db.String(120), nullable=False, unique=True)
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Client(db.Model):
     __tablename__ = 'clients'
+    __table_args__ = (
+        db.Index('ix_clients_company_created', 'company_id', 'created_at', 'id'),
+        db.Index('ix_clients_category', 'category_id'),
+    )
 
     id = db.Column(db.String(36), primary_key=True)
     company_id = db.Column(db.String(36), db.ForeignKey('companies.id_company'), nullable=False)
@@ -0,0 +1,13 @@
+from app.extensions import db
+from datetime import datetime
+
+# Estadísticas del panel por empresa. Cada escritura en productos, categorías,
+# clientes o tickets incrementa `changes`; si computed_changes se queda atrás
+# la siguiente lectura las recalcula con agregados SQL (app/company_stats.py).
+class CompanyStats(db.Model):
+    __tablename__ = 'company_stats'
+    company_id = db.Column(db.String, db.ForeignKey('companies.id_company'), primary_key=True)
+    stats = db.Column(db.JSON, nullable=False)
+    changes = db.Column(db.Integer, nullable=False, default=0)
+    computed_changes = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
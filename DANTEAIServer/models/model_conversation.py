@@ -0,0 +1,20 @@
+from app.extensions import db
+import uuid
+
+# Resumen por (dueño, contacto) para la bandeja de entrada: se mantiene al crear,
+# leer y borrar mensajes, así no hay que agregar sobre la tabla messages.
+class ConversationSummary(db.Model):
+    __tablename__ = 'conversation_summaries'
+    __table_args__ = (
+        db.UniqueConstraint('owner_id', 'peer_id', name='uq_conversation_summaries_owner_peer'),
+        db.Index('ix_conversation_summaries_owner_last', 'owner_id', 'last_message_at'),
+    )
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    owner_id = db.Column(db.String(36), db.ForeignKey('users.id_user'), nullable=False)
+    peer_id = db.Column(db.String(36), db.ForeignKey('users.id_user'), nullable=False)
+    last_message_id = db.Column(db.String(36), db.ForeignKey('messages.id'))
+    last_message_at = db.Column(db.DateTime)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+
+    peer = db.relationship('User', foreign_keys=[peer_id])
+    last_message = db.relationship('Message', foreign_keys=[last_message_id])
@@ -5,6 +5,10 @@ import uuid
 # MODELOS
 class Message(db.Model):
     __tablename__ = 'messages'
+    __table_args__ = (
+        # Conversaciones: filtro por pareja (emisor, receptor) ordenado por fecha
+        db.Index('ix_messages_sender_receiver_created', 'sender_id', 'receiver_id', 'created_at'),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     sender_id = db.Column(db.String(36), db.ForeignKey('users.id_user'), nullable=False)
     receiver_id = db.Column(db.String(36), db.ForeignKey('users.id_user'), nullable=False)
@@ -3,6 +3,14 @@ from datetime import datetime
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Listados por empresa / categoría en orden keyset (created_at, id)
+        db.Index('ix_products_company_created', 'company_id', 'created_at', 'id_product'),
+        db.Index('ix_products_category_created', 'category_id', 'created_at', 'id_product'),
+        # Parcial: solo productos activos (top de productos)
+        db.Index('ix_products_company_active_created', 'company_id', 'created_at',
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active = 1')),
+    )
     id_product = db.Column(db.String, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -14,7 +22,11 @@ class Product(db.Model):
     company_id = db.Column(db.String, db.ForeignKey('companies.id_company'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Concurrencia optimista: cada UPDATE lo incrementa (ORM y lotes de app/product_batch.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     category = db.relationship('Category', backref=db.backref('products', lazy=True))
     company = db.relationship('Company', backref=db.backref('products', lazy=True))
 
+    __mapper_args__ = {'version_id_col': version}
+
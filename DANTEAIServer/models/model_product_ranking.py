@@ -0,0 +1,35 @@
+from app.extensions import db
+
+# Unidades movidas por producto y día; base de las ventanas del ranking
+class ProductActivityDaily(db.Model):
+    __tablename__ = 'product_activity_daily'
+    __table_args__ = (
+        db.Index('ix_product_activity_daily_company_day', 'company_id', 'day'),
+    )
+    product_id = db.Column(db.String, db.ForeignKey('products.id_product'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    company_id = db.Column(db.String, db.ForeignKey('companies.id_company'), nullable=False)
+    units = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Puntuación acumulada por ventana; los índices (empresa, puntuación) hacen
+# que el top-K se lea en O(K) sin recorrer el catálogo.
+class ProductScore(db.Model):
+    __tablename__ = 'product_scores'
+    __table_args__ = (
+        db.Index('ix_product_scores_company_7d', 'company_id', 'units_7d'),
+        db.Index('ix_product_scores_company_30d', 'company_id', 'units_30d'),
+        db.Index('ix_product_scores_company_total', 'company_id', 'units_total'),
+    )
+    product_id = db.Column(db.String, db.ForeignKey('products.id_product'), primary_key=True)
+    company_id = db.Column(db.String, db.ForeignKey('companies.id_company'), nullable=False)
+    units_7d = db.Column(db.Integer, nullable=False, default=0)
+    units_30d = db.Column(db.Integer, nullable=False, default=0)
+    units_total = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Día hasta el que están alineadas las ventanas de cada empresa
+class RankingState(db.Model):
+    __tablename__ = 'ranking_state'
+    company_id = db.Column(db.String, db.ForeignKey('companies.id_company'), primary_key=True)
+    rolled_on = db.Column(db.Date, nullable=False)
@@ -0,0 +1,30 @@
+from app.extensions import db
+from datetime import datetime
+
+# Índice de recuperación del asistente (BM25) por empresa. Un documento por
+# registro ('product:<id>', 'client:<id>', ...) y sus términos en postings.
+class RetrievalDocument(db.Model):
+    __tablename__ = 'retrieval_documents'
+    __table_args__ = (
+        db.Index('ix_retrieval_documents_company', 'company_id'),
+    )
+    id = db.Column(db.String, primary_key=True)
+    company_id = db.Column(db.String, db.ForeignKey('companies.id_company'), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.String, nullable=False)
+    title = db.Column(db.String(255))
+    length = db.Column(db.Integer, nullable=False, default=0)
+    embedding = db.Column(db.JSON)  # solo si hay un modelo de embeddings configurado
+    indexed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class RetrievalPosting(db.Model):
+    __tablename__ = 'retrieval_postings'
+    __table_args__ = (
+        db.Index('ix_retrieval_postings_company_term', 'company_id', 'term'),
+    )
+    document_id = db.Column(db.String, db.ForeignKey('retrieval_documents.id', ondelete='CASCADE'),
+                            primary_key=True)
+    term = db.Column(db.String(64), primary_key=True)
+    company_id = db.Column(db.String, nullable=False)
+    tf = db.Column(db.Integer, nullable=False)
@@ -4,6 +4,10 @@ from datetime import datetime
 
 class SupportTicket(db.Model):
     __tablename__ = 'support_tickets'
+    __table_args__ = (
+        db.Index('ix_support_tickets_user_status', 'user_id', 'status'),
+        db.Index('ix_support_tickets_created', 'created_at', 'id'),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     subject = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=False)
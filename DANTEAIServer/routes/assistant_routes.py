@@ -0,0 +1,35 @@
+from flask import Blueprint, request, jsonify
+from models.all_schemas import product_schema, client_schema, category_schema, support_ticket_schema
+from app import retrieval
+
+bp = Blueprint('assistant', __name__)
+
+CONTEXT_SCHEMAS = {
+    'product': product_schema,
+    'client': client_schema,
+    'category': category_schema,
+    'ticket': support_ticket_schema,
+}
+MAX_CONTEXT_RECORDS = 50
+
+
+# -------------------- ASISTENTE (DanteAI) --------------------
+# Registros de la empresa más relevantes para una pregunta:
+# /api/assistant/context?company_id=...&q=...&k=5&types=product,client
+@bp.route('/api/assistant/context', methods=['GET'])
+def get_assistant_context():
+    company_id = request.args.get('company_id')
+    q = (request.args.get('q') or '').strip()
+    if not company_id:
+        return {"msg": "Falta el parámetro company_id"}, 400
+    if not q:
+        return {"msg": "Falta el parámetro q"}, 400
+
+    types = [t for t in request.args.get('types', '').split(',') if t]
+    unknown = [t for t in types if t not in CONTEXT_SCHEMAS]
+    if unknown:
+        return {"msg": f"Tipo inválido: {', '.join(unknown)}"}, 400
+    k = max(1, min(request.args.get('k', 5, type=int) or 5, MAX_CONTEXT_RECORDS))
+
+    ranked = retrieval.top_documents(company_id, q, k, types or None)
+    return jsonify({"query": q, "records": retrieval.load_records(ranked, CONTEXT_SCHEMAS)}), 200
@@ -0,0 +1,45 @@
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import select
+from models.model_product import Product
+from models.model_client import Client
+from models.all_schemas import products_schema, clients_schema
+from app.pagination import stream_ndjson
+from app import bulk
+
+bp = Blueprint('bulk', __name__)
+
+BULK_ENTITIES = {
+    'products': ('product', Product, products_schema, Product.id_product),
+    'clients': ('client', Client, clients_schema, Client.id),
+}
+
+
+# -------------------- IMPORTACIÓN / EXPORTACIÓN MASIVA --------------------
+# POST /api/products/import?company_id=...   (CSV o NDJSON en el cuerpo)
+@bp.route('/api/products/import', methods=['POST'], defaults={'kind': 'products'})
+@bp.route('/api/clients/import', methods=['POST'], defaults={'kind': 'clients'})
+def bulk_import(kind):
+    company_id = request.args.get('company_id')
+    if not company_id:
+        return {"msg": "Falta el parámetro company_id"}, 400
+
+    # Los ficheros de alta masiva superan el límite general de subida
+    request.max_content_length = current_app.config['BULK_IMPORT_MAX_BYTES']
+    entity = BULK_ENTITIES[kind][0]
+    report = bulk.import_records(entity, company_id, request.stream, bulk.request_format())
+    return jsonify(report), 200
+
+
+# GET /api/products/export?company_id=...&format=csv|ndjson
+@bp.route('/api/products/export', methods=['GET'], defaults={'kind': 'products'})
+@bp.route('/api/clients/export', methods=['GET'], defaults={'kind': 'clients'})
+def bulk_export(kind):
+    company_id = request.args.get('company_id')
+    if not company_id:
+        return {"msg": "Falta el parámetro company_id"}, 400
+
+    entity, model, schema, id_col = BULK_ENTITIES[kind]
+    query = select(model).filter_by(company_id=company_id)
+    if bulk.request_format() == 'ndjson':
+        return stream_ndjson(query, schema, model.created_at, id_col)
+    return bulk.export_csv(entity, query, f"{kind}-{company_id}.csv")
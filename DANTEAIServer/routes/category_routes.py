@@ -1,14 +1,21 @@
 
-from index import app, db
+from app.extensions import db
 from app.init import allowed_file
-from flask import  request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models.model_category import Category
 from models.all_schemas import category_schema, categories_schema
+from app.pagination import list_response
+from app.media import save_upload, referenced_upload
+from app.cache import cached_catalog
+from app.signals import notify_change
+from app import listings
 import os
 import uuid
 
+bp = Blueprint('category', __name__)
+
 # -------------------- RUTAS CATEGORY --------------------
-@app.route('/api/categories', methods=['POST'])
+@bp.route('/api/categories', methods=['POST'])
 def create_category():
     name = request.form.get('name')
     description = request.form.get('description', '')
@@ -22,16 +29,9 @@ def create_category():
     if Category.query.filter_by(name=name).first():
         return jsonify({"message": "Categoría ya registrada"}), 400
 
-    filename = None
+    filename = referenced_upload(request.form.get('image_ref'))
     if image_file and allowed_file(image_file.filename):
-        ext = os.path.splitext(image_file.filename)[1]
-        filename = f"{uuid.uuid4().hex}{ext}"
-        image_dir = os.path.join(app.instance_path, 'uploads', 'avatars')
-        os.makedirs(image_dir, exist_ok=True)
-        ext = os.path.splitext(image_file.filename)[1]
-        filename = f"{uuid.uuid4().hex}{ext}"
-        image_path = os.path.join(image_dir, filename)
-        image_file.save(image_path)
+        filename = save_upload(image_file)
     elif image_file:
         return jsonify({"message": "Extensión de imagen no permitida"}), 400
 
@@ -46,27 +46,23 @@ def create_category():
         )
         db.session.add(category)
         db.session.commit()
+        notify_change('category', category.company_id, [category.id_category], 'create',
+                      category_ids=[category.id_category])
         return category_schema.jsonify(category), 201
     except Exception as e:
         db.session.rollback()
-        print("[ERROR crear categoría]", e)
+        current_app.logger.exception("Error al crear categoría")
         return jsonify({"message": "Error al crear categoría", "error": str(e)}), 500
 
 
-@app.route('/api/categories', methods=['GET'])
+@bp.route('/api/categories', methods=['GET'])
+@cached_catalog
 def get_categories():
-    company_id = request.args.get('company_id')
-    typeon = request.args.get('typeon')
-    
-    if company_id:
-        categories = Category.query.filter_by(company_id=company_id, typeon=int(typeon)).order_by(Category.created_at.desc()).all()
-    else:
-        categories = Category.query.order_by(Category.created_at.desc()).all()
-
-    return categories_schema.jsonify(categories), 200
+    query = listings.categories(request.args.get('company_id'), request.args.get('typeon'))
+    return list_response(query, categories_schema, Category.created_at, Category.id_category)
 
 
-@app.route('/api/categories/<id>', methods=['GET'])
+@bp.route('/api/categories/<id>', methods=['GET'])
 def get_category(id):
     category = Category.query.get(id)
     if not category:
@@ -74,7 +70,7 @@ def get_category(id):
     return category_schema.jsonify(category), 200
 
 
-@app.route('/api/categories/<id>', methods=['PUT'])
+@bp.route('/api/categories/<id>', methods=['PUT'])
 def update_category(id):
     category = Category.query.get(id)
     if not category:
@@ -86,11 +82,9 @@ def update_category(id):
         description = request.form.get('description', category.description)
         image_file = request.files.get('image')
         if image_file and allowed_file(image_file.filename):
-            ext = os.path.splitext(image_file.filename)[1]
-            filename = f"{uuid.uuid4().hex}{ext}"
-            image_path = os.path.join(app.instance_path, 'uploads', 'avatars')
-            image_file.save(image_path)
-            category.image = filename
+            category.image = save_upload(image_file)
+        elif referenced_upload(request.form.get('image_ref')):
+            category.image = request.form['image_ref']
         elif image_file:
             return jsonify({"message": "Extensión de imagen no permitida"}), 400
     else:
@@ -103,13 +97,15 @@ def update_category(id):
 
     try:
         db.session.commit()
+        notify_change('category', category.company_id, [category.id_category], 'update',
+                      category_ids=[category.id_category])
         return category_schema.jsonify(category), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Error al actualizar categoría", "error": str(e)}), 500
 
 
-@app.route('/api/categories/<id>', methods=['DELETE'])
+@bp.route('/api/categories/<id>', methods=['DELETE'])
 def delete_category(id):
     category = Category.query.get(id)
     if not category:
@@ -118,6 +114,8 @@ def delete_category(id):
     try:
         db.session.delete(category)
         db.session.commit()
+        notify_change('category', category.company_id, [category.id_category], 'delete',
+                      category_ids=[category.id_category])
         return '', 204
     except Exception as e:
         db.session.rollback()
@@ -1,13 +1,19 @@
 
-from index import app,  db
-from flask import  request, jsonify
+from app.extensions import db
+from flask import Blueprint, request, jsonify
 from models.model_client import *
 from models.all_schemas import client_schema, clients_schema
+from app.pagination import list_response
+from app.media import save_upload, remove_media, referenced_upload
+from app.signals import notify_change
+from app import listings
 import os
 import uuid
 from werkzeug.utils import secure_filename
 
-@app.route('/api/clients', methods=['POST'])
+bp = Blueprint('client', __name__)
+
+@bp.route('/api/clients', methods=['POST'])
 def create_client():
     company_id = request.form.get('company_id')
     name = request.form.get('name')
@@ -19,15 +25,9 @@ def create_client():
     category_id = request.form.get('category_id')
 
     file = request.files.get('avatar')
-    avatar_filename = None
+    avatar_filename = referenced_upload(request.form.get('avatar_ref'))
     if file:
-        filename = secure_filename(file.filename)
-        unique_name = f"{uuid.uuid4()}_{filename}"
-        upload_folder = app.config['AVATAR_UPLOAD_FOLDER']
-        os.makedirs(upload_folder, exist_ok=True)
-        file_path = os.path.join(upload_folder, unique_name)
-        file.save(file_path)
-        avatar_filename = unique_name
+        avatar_filename = save_upload(file)
 
     client = Client(
         id=str(uuid.uuid4()),
@@ -45,33 +45,35 @@ def create_client():
 
     db.session.add(client)
     db.session.commit()
+    notify_change('client', client.company_id, [client.id], 'create')
 
     return client_schema.jsonify(client), 201
 
 
-@app.route('/api/clients', methods=['GET'])
+@bp.route('/api/clients', methods=['GET'])
 def get_clients():
     # Obtener company_id desde query param
     company_id = request.args.get('company_id')
     if not company_id:
         return {"msg": "Falta el parámetro company_id"}, 400
     
-    clients = Client.query.filter_by(company_id=company_id).order_by(Client.created_at.desc()).all()
-    return clients_schema.jsonify(clients), 200
+    return list_response(listings.clients(company_id), clients_schema, Client.created_at, Client.id)
 
-@app.route('/api/clients/<id>', methods=['GET'])
+@bp.route('/api/clients/<id>', methods=['GET'])
 def get_client(id):
     client = Client.query.get(id)
     if not client:
         return jsonify({"message": "Cliente no encontrado"}), 404
     return client_schema.jsonify(client), 200
 
-@app.route('/api/clients/<id>', methods=['PUT'])
+@bp.route('/api/clients/<id>', methods=['PUT'])
 def update_client(id):
     client = Client.query.get(id)
     if not client:
         return jsonify({"message": "Cliente no encontrado"}), 404
 
+    previous_company_id = client.company_id
+
     # Leer campos desde request.form
     client.name = request.form.get('name', client.name)
     client.email = request.form.get('email', client.email)
@@ -86,26 +88,23 @@ def update_client(id):
     if 'avatar' in request.files:
         avatar = request.files['avatar']
         if avatar.filename != '':
-            from werkzeug.utils import secure_filename
-            import os, uuid
-
-            UPLOAD_FOLDER = os.path.join(app.instance_path, 'uploads', 'avatars')
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-            filename = f"{uuid.uuid4()}_{secure_filename(avatar.filename)}"
-            avatar_path = os.path.join(UPLOAD_FOLDER, filename)
-            avatar.save(avatar_path)
+            filename = save_upload(avatar)
 
             # Elimina el avatar anterior si existe
-            if client.avatar:
-                old_path = os.path.join(UPLOAD_FOLDER, client.avatar)
-                if os.path.exists(old_path):
-                    os.remove(old_path)
+            if client.avatar != filename:
+                remove_media(client.avatar)
 
             client.avatar = filename
+    elif referenced_upload(request.form.get('avatar_ref')):
+        if client.avatar != request.form['avatar_ref']:
+            remove_media(client.avatar)
+        client.avatar = request.form['avatar_ref']
 
     try:
         db.session.commit()
+        notify_change('client', client.company_id, [client.id], 'update')
+        if previous_company_id != client.company_id:
+            notify_change('client', previous_company_id, [client.id], 'update')
         return client_schema.jsonify(client), 200
     except Exception as e:
         db.session.rollback()
@@ -113,7 +112,7 @@ def update_client(id):
 
 
 
-@app.route('/api/clients/<id>', methods=['DELETE'])
+@bp.route('/api/clients/<id>', methods=['DELETE'])
 def delete_client(id):
     client = Client.query.get(id)
     if not client:
@@ -122,6 +121,7 @@ def delete_client(id):
     try:
         db.session.delete(client)
         db.session.commit()
+        notify_change('client', client.company_id, [client.id], 'delete')
         return '', 204
     except Exception as e:
         db.session.rollback()
@@ -1,6 +1,6 @@
 
-from index import app,  db
-from flask import  request, jsonify
+from app.extensions import db
+from flask import Blueprint, request, jsonify
 from models.model_company import *
 from models.all_schemas import company_schema, companies_schema
 import os
@@ -9,29 +9,34 @@ from werkzeug.utils import secure_filename
 from flask_jwt_extended import (
      create_access_token
 )
+from app.hashing import HashingBusy, needs_rehash, note_rehash
+from app import company_stats
+
+bp = Blueprint('company', __name__)
 
 # -------------------- RUTAS COMPANY --------------------
-@app.route('/api/companies', methods=['POST'])
+@bp.route('/api/companies', methods=['POST'])
 def create_company():
 
 
      data = request.get_json()
-     print(data.get('name') )
-     print("entrando")
      if not data.get('name') or not data.get('email') or not data.get('password'):
          return jsonify({"message": "Campos obligatorios faltantes"}), 400
 
      company_id = str(uuid.uuid4())
-     company = Company(
-         id_company=company_id,
-         name=data['name'],
-         email=data['email'],
-         phone=data.get('phone'),
-         company_name=data.get('company_name'),
-         rif=data.get('rif'),
-         address=data.get('address'),
-         password=data['password'],
-     )
+     try:
+         company = Company(
+             id_company=company_id,
+             name=data['name'],
+             email=data['email'],
+             phone=data.get('phone'),
+             company_name=data.get('company_name'),
+             rif=data.get('rif'),
+             address=data.get('address'),
+             password=data['password'],
+         )
+     except HashingBusy:
+         return jsonify({"message": "Servidor ocupado, reintente"}), 503, {"Retry-After": "1"}
      try:
          db.session.add(company)
          db.session.commit()
@@ -40,16 +45,23 @@ def create_company():
         db.session.rollback()
      return jsonify({"message": "Error al guardar empresa", "error": str(e)}), 500
 
-@app.route('/api/companies/login', methods=['POST'])
+@bp.route('/api/companies/login', methods=['POST'])
 def login_company():
     data = request.get_json()
     email = data.get('email')
     password = data.get('password')
-    print("llamando a este")
 
     company = Company.query.filter_by(email=email).first()
-    if not company or not company.check_password(password):
-        return jsonify({"message": "Credenciales inválidas"}), 401
+    try:
+        if not company or not company.check_password(password):
+            return jsonify({"message": "Credenciales inválidas"}), 401
+
+        if needs_rehash(company.password_hash):
+            company.set_password(password)
+            db.session.commit()
+            note_rehash()
+    except HashingBusy:
+        return jsonify({"message": "Servidor ocupado, reintente"}), 503, {"Retry-After": "1"}
 
     token = create_access_token(identity=company.id_company)
     return jsonify({
@@ -57,7 +69,16 @@ def login_company():
         "company": company_schema.dump(company)
     }), 200
 
-# @app.route('/api/companies', methods=['GET'])
+# Panel de la empresa: totales calculados en SQL y guardados en company_stats
+@bp.route('/api/companies/<id>/stats', methods=['GET'])
+def get_company_stats(id):
+    if not db.session.get(Company, id):
+        return jsonify({"message": "Empresa no encontrada"}), 404
+    stats, computed_at, cached = company_stats.get_stats(id)
+    return jsonify({**stats, "computed_at": computed_at.isoformat()}), 200, \
+        {"X-Stats-Cache": "HIT" if cached else "MISS"}
+
+# @bp.route('/api/companies', methods=['GET'])
 # def get_companies():
 #     print("llamando a este3")
 #     companies = Company.query.all()
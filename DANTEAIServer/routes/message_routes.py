@@ -1,13 +1,20 @@
 
-from index import app,  db
-from flask import  request, jsonify
+from app.extensions import db
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from models.model_message import *
-from models.all_schemas import message_schema, messages_schema
+from models.model_conversation import ConversationSummary
+from models.all_schemas import message_schema, messages_schema, conversation_summaries_schema
+from app.pagination import list_response
+from app.realtime import publish_message, sse_stream
+from app import inbox, listings
+from sqlalchemy import tuple_, update, select
+from collections import Counter
 
+bp = Blueprint('message', __name__)
 
 
 # Crear mensaje
-@app.route('/api/messages', methods=['POST'])
+@bp.route('/api/messages', methods=['POST'])
 def create_message():
     data = request.get_json()
     sender_id = data.get('sender_id')
@@ -20,43 +27,140 @@ def create_message():
     message = Message(sender_id=sender_id, receiver_id=receiver_id, content=content)
 
     db.session.add(message)
+    db.session.flush()
+    inbox.record_message(message)
     db.session.commit()
 
-    return message_schema.jsonify(message), 201
+    data = message_schema.dump(message)
+    publish_message(data)
+    return jsonify(data), 201
+
+# Bandeja de entrada: contactos con último mensaje y no leídos (tabla de resumen)
+@bp.route('/api/messages/inbox', methods=['GET'])
+def get_inbox():
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({'message': 'Parámetro user_id es requerido'}), 400
+
+    return list_response(listings.inbox(user_id), conversation_summaries_schema,
+                         ConversationSummary.last_message_at, ConversationSummary.id)
+
+# Canal push (Server-Sent Events) con los mensajes nuevos del usuario
+@bp.route('/api/messages/stream/<user_id>', methods=['GET'])
+def stream_messages(user_id):
+    events = sse_stream(user_id, current_app.config['REALTIME_KEEPALIVE'])
+    return Response(stream_with_context(events), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 # Obtener conversación entre dos usuarios
-@app.route('/api/messages/<user_id>', methods=['GET'])
+#   sin parámetros              -> historial completo (ascendente)
+#   ?since=<ISO> | ?after_id=   -> solo los mensajes nuevos (sincronización incremental)
+#   ?before_id=<id>&limit=N     -> página de historial anterior a ese mensaje
+@bp.route('/api/messages/<user_id>', methods=['GET'])
 def get_conversation(user_id):
     other_user_id = request.args.get('other_user_id')
     if not other_user_id:
         return jsonify({'message': 'Parámetro other_user_id es requerido'}), 400
 
-    messages = Message.query.filter(
-        ((Message.sender_id == user_id) & (Message.receiver_id == other_user_id)) |
-        ((Message.sender_id == other_user_id) & (Message.receiver_id == user_id))
-    ).order_by(Message.created_at.asc()).all()
-
+    anchor = None
+    anchor_id = request.args.get('after_id') or request.args.get('before_id')
+    if anchor_id:
+        anchor = db.session.get(Message, anchor_id)
+        if not anchor:
+            return jsonify({'message': 'Mensaje de referencia no encontrado'}), 404
+
+    try:
+        query, newest_first = listings.conversation_window(
+            listings.conversation(user_id, other_user_id), request.args, anchor)
+    except ValueError:
+        return jsonify({'message': 'Parámetro since inválido'}), 400
+
+    messages = db.session.scalars(query).all()
+    if newest_first:
+        # Historial bajo demanda: se devuelve en orden ascendente
+        messages.reverse()
     return messages_schema.jsonify(messages), 200
 
 # Marcar como leído
-@app.route('/api/messages/<message_id>/read', methods=['PUT'])
+@bp.route('/api/messages/<message_id>/read', methods=['PUT'])
 def mark_message_as_read(message_id):
     message = Message.query.get(message_id)
     if not message:
         return jsonify({"message": "Mensaje no encontrado"}), 404
 
-    message.is_read = True
+    if not message.is_read:
+        message.is_read = True
+        inbox.mark_read(message.receiver_id, message.sender_id)
     db.session.commit()
 
     return message_schema.jsonify(message), 200
 
+# Marcar varios como leídos en una sola transacción:
+#   {"user_id", "other_user_id", "up_to_id"?} -> toda la conversación (hasta ese mensaje)
+#   {"user_id", "ids": [...]}                 -> lista concreta de mensajes recibidos
+@bp.route('/api/messages/read', methods=['PUT'])
+def mark_messages_as_read():
+    data = request.get_json() or {}
+    user_id = data.get('user_id')
+    other_user_id = data.get('other_user_id')
+    ids = data.get('ids')
+    if not user_id or not (other_user_id or ids):
+        return jsonify({'message': 'user_id y other_user_id o ids son requeridos'}), 400
+
+    conditions = [Message.receiver_id == user_id, Message.is_read == False]
+    if ids:
+        if not isinstance(ids, list):
+            return jsonify({'message': 'ids debe ser una lista'}), 400
+        conditions.append(Message.id.in_(ids))
+    else:
+        conditions.append(Message.sender_id == other_user_id)
+        up_to_id = data.get('up_to_id')
+        if up_to_id:
+            anchor = Message.query.get(up_to_id)
+            if not anchor:
+                return jsonify({'message': 'Mensaje de referencia no encontrado'}), 404
+            conditions.append(tuple_(Message.created_at, Message.id) <= tuple_(anchor.created_at, anchor.id))
+
+    try:
+        if other_user_id and not ids:
+            result = db.session.execute(update(Message).where(*conditions).values(is_read=True))
+            per_sender = Counter({other_user_id: result.rowcount})
+        elif db.session.get_bind().dialect.update_returning:
+            rows = db.session.execute(
+                update(Message).where(*conditions).values(is_read=True).returning(Message.sender_id)
+            )
+            per_sender = Counter(sender_id for (sender_id,) in rows)
+        else:
+            # Sin RETURNING, un UPDATE por emisor: su rowcount solo cuenta las filas
+            # que marcó esta petición. Contarlas antes con un SELECT restaría dos
+            # veces las que otra petición marque a la vez.
+            senders = db.session.execute(
+                select(Message.sender_id).where(*conditions).distinct()
+            ).scalars().all()
+            per_sender = Counter()
+            for sender_id in senders:
+                result = db.session.execute(
+                    update(Message).where(*conditions, Message.sender_id == sender_id).values(is_read=True)
+                )
+                per_sender[sender_id] = result.rowcount
+
+        for sender_id, count in per_sender.items():
+            inbox.mark_read(user_id, sender_id, count)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Error al marcar mensajes', 'error': str(e)}), 500
+
+    return jsonify({'updated': sum(per_sender.values())}), 200
+
 # Eliminar mensaje
-@app.route('/api/messages/<message_id>', methods=['DELETE'])
+@bp.route('/api/messages/<message_id>', methods=['DELETE'])
 def delete_message(message_id):
     message = Message.query.get(message_id)
     if not message:
         return jsonify({"message": "Mensaje no encontrado"}), 404
 
+    inbox.forget_message(message)
     db.session.delete(message)
     db.session.commit()
     return jsonify({'message': 'Mensaje eliminado'}), 200
\ No newline at end of file
@@ -1,17 +1,25 @@
 
-from index import app, db
+from app.extensions import db
 from app.init import allowed_file
 
-from flask import  request, jsonify
+from flask import Blueprint, request, jsonify
 from models.model_product import *
 from models.all_schemas import product_schema, products_schema
+from app.pagination import list_response
+from app.media import save_upload, referenced_upload
+from app.cache import cached_catalog
+from app.signals import notify_change
+from app import listings, ranking, product_batch
+from sqlalchemy.orm.exc import StaleDataError
 import os
 import uuid
 
+bp = Blueprint('product', __name__)
+
 
 # --------------------- PRODUCTOS ----------
 
-@app.route('/api/products', methods=['POST'])
+@bp.route('/api/products', methods=['POST'])
 def create_product():
     name = request.form.get('name')
     description = request.form.get('description', '')
@@ -20,16 +28,12 @@ def create_product():
     category_id = request.form.get('category_id')
     company_id = request.form.get('company_id')
     image_file = request.files.get('image')
-    print(f"{name} - {price} - {stock} - {category_id} {company_id}")
     if not all([name, price, stock, category_id, company_id]):
         return jsonify({"message": "Faltan campos requeridos"}), 400
 
-    filename = None
+    filename = referenced_upload(request.form.get('image_ref'))
     if image_file and allowed_file(image_file.filename):
-        ext = os.path.splitext(image_file.filename)[1]
-        filename = f"{uuid.uuid4().hex}{ext}"
-        image_path = os.path.join(app.config['AVATAR_UPLOAD_FOLDER'], filename)
-        image_file.save(image_path)
+        filename = save_upload(image_file)
 
     product = Product(
         id_product=str(uuid.uuid4()),
@@ -45,37 +49,49 @@ def create_product():
     try:
         db.session.add(product)
         db.session.commit()
+        notify_change('product', product.company_id, [product.id_product], 'create',
+                      category_ids=[product.category_id])
         return product_schema.jsonify(product), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Error al crear producto", "error": str(e)}), 500
     
-@app.route('/api/product/<string:id>', methods=['GET'])
+@bp.route('/api/product/<string:id>', methods=['GET'])
 def get_product(id):
     product = Product.query.filter_by(id_product=id).first()
     if not product:
         return jsonify({"message": "Producto no encontrado"}), 404
     return product_schema.jsonify(product)
 
-@app.route('/api/products', methods=['GET'])
+@bp.route('/api/products', methods=['GET'])
+@cached_catalog
 def get_products():
-    company_id = request.args.get('company_id')
-    category_id = request.args.get('category_id')
-    if company_id:
-        products = Product.query.filter_by(company_id=company_id).order_by(Product.created_at.desc()).all()
-    elif category_id:
-        products = Product.query.filter_by(category_id=category_id).order_by(Product.created_at.desc()).all()
-    else:
-        products = Product.query.order_by(Product.created_at.desc()).all()
-    return products_schema.jsonify(products), 200
+    query = listings.products(request.args.get('company_id'), request.args.get('category_id'))
+    return list_response(query, products_schema, Product.created_at, Product.id_product)
 
-@app.route('/api/products/<id>', methods=['PUT'])
+@bp.route('/api/products/<id>', methods=['PUT'])
 def update_product(id):
     product = Product.query.get(id)
     if not product:
         return jsonify({"message": "Producto no encontrado"}), 404
 
-    if 'multipart/form-data' in request.content_type:
+    is_form = 'multipart/form-data' in request.content_type
+    data = request.form if is_form else request.get_json()
+    # Concurrencia optimista opcional: el cliente envía la versión que leyó
+    version = data.get('version')
+    if version not in (None, ''):
+        try:
+            # Los formularios la envían como texto; en JSON ha de ser un entero
+            version = int(version) if isinstance(version, str) else version
+        except ValueError:
+            version = None
+        if not isinstance(version, int) or isinstance(version, bool):
+            return jsonify({"message": "version debe ser un entero"}), 400
+        if version != product.version:
+            return jsonify({"message": "El producto fue modificado por otra petición",
+                            "version": product.version}), 409
+
+    if is_form:
         name = request.form.get('name', product.name)
         description = request.form.get('description', product.description)
         price = request.form.get('price', type=float) or product.price
@@ -85,21 +101,22 @@ def update_product(id):
         image_file = request.files.get('image')
 
         if image_file and allowed_file(image_file.filename):
-            ext = os.path.splitext(image_file.filename)[1]
-            filename = f"{uuid.uuid4().hex}{ext}"
-            image_path = os.path.join(app.config['AVATAR_UPLOAD_FOLDER'], filename)
-            image_file.save(image_path)
-            product.image = filename
+            product.image = save_upload(image_file)
+        elif referenced_upload(request.form.get('image_ref')):
+            product.image = request.form['image_ref']
 
     else:
-        data = request.get_json()
         name = data.get('name', product.name)
         description = data.get('description', product.description)
         price = data.get('price', product.price)
         stock = data.get('stock', product.stock)
         is_active = data.get('is_active', product.is_active)
         category_id = data.get('category_id', product.category_id)
+        if referenced_upload(data.get('image_ref')):
+            product.image = data['image_ref']
 
+    previous_category_id = product.category_id
+    previous_stock = product.stock
     product.name = name
     product.description = description
     product.price = price
@@ -108,34 +125,88 @@ def update_product(id):
     product.category_id = category_id
 
     try:
+        ranking.record_stock_change(product, previous_stock, product.stock)
         db.session.commit()
+        notify_change('product', product.company_id, [product.id_product], 'update',
+                      category_ids=[previous_category_id, product.category_id])
         return product_schema.jsonify(product), 200
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({"message": "El producto fue modificado por otra petición"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Error al actualizar", "error": str(e)}), 500
 
-@app.route('/api/products/<id>', methods=['DELETE'])
+@bp.route('/api/products/<id>', methods=['DELETE'])
 def delete_product(id):
     product = Product.query.get(id)
     if not product:
         return jsonify({"message": "Producto no encontrado"}), 404
 
     try:
+        ranking.forget_product(product.id_product)
         db.session.delete(product)
         db.session.commit()
+        notify_change('product', product.company_id, [product.id_product], 'delete',
+                      category_ids=[product.category_id])
         return '', 204
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Error al eliminar", "error": str(e)}), 500    
 
-@app.route('/api/products/top', methods=['GET'])
-def get_top_products():
-    company_id = request.args.get('company_id')
-    query = Product.query.filter_by(is_active=True)
-    if company_id:
-        query = query.filter_by(company_id=company_id)
+# Parches y ajustes de stock en lote:
+# {"company_id": "...", "atomic": false,
+#  "items": [{"id_product": "...", "version": 3, "set": {"price": 9.5}, "stock_delta": -2}]}
+@bp.route('/api/products/batch', methods=['POST'])
+def batch_update_products():
+    data = request.get_json() or {}
+    company_id = data.get('company_id')
+    items = data.get('items')
+    if not company_id or not isinstance(items, list) or not items:
+        return jsonify({"message": "company_id e items son obligatorios"}), 400
+    if len(items) > product_batch.MAX_BATCH_ITEMS:
+        return jsonify({"message": f"Máximo {product_batch.MAX_BATCH_ITEMS} elementos por lote"}), 400
 
-    # Por ejemplo, los 10 últimos productos activos
-    top_products = query.order_by(Product.created_at.desc()).limit(10).all()
+    try:
+        results, updated_ids, category_ids = product_batch.apply_batch(
+            company_id, items, atomic=bool(data.get('atomic')))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Error al aplicar el lote", "error": str(e)}), 500
 
-    return products_schema.jsonify(top_products), 200
\ No newline at end of file
+    if updated_ids:
+        notify_change('product', company_id, updated_ids, 'update', category_ids=sorted(c for c in category_ids if c))
+    status = 409 if data.get('atomic') and any(r["status"] != "updated" for r in results) else 200
+    return jsonify({"updated": len(updated_ids), "results": results}), status
+
+@bp.route('/api/products/top', methods=['GET'])
+@cached_catalog
+def get_top_products():
+    company_id = request.args.get('company_id')
+    window = request.args.get('window', '7d')
+    if window not in ranking.WINDOWS:
+        return jsonify({"message": "Ventana inválida (7d, 30d, all)"}), 400
+    limit = min(request.args.get('limit', 10, type=int) or 10, 100)
+
+    ranked = ranking.top_products(company_id, window, limit)
+    items = []
+    for product, score in ranked:
+        item = products_schema.dump(product, many=False)
+        item['score'] = score
+        items.append(item)
+
+    # Sin movimientos suficientes se completa con los últimos productos activos
+    if len(items) < limit:
+        # Literal (no parámetro) para que el planificador use el índice parcial de activos
+        query = Product.query.filter(Product.is_active == db.true())
+        if company_id:
+            query = query.filter_by(company_id=company_id)
+        seen = [product.id_product for product, _ in ranked]
+        if seen:
+            query = query.filter(Product.id_product.notin_(seen))
+        for product in query.order_by(Product.created_at.desc()).limit(limit - len(items)).all():
+            item = products_schema.dump(product, many=False)
+            item['score'] = 0
+            items.append(item)
+
+    return jsonify(items), 200
\ No newline at end of file
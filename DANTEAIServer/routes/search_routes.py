@@ -0,0 +1,43 @@
+from flask import Blueprint, request, jsonify
+from models.model_product import Product
+from models.model_client import Client
+from models.all_schemas import products_schema, clients_schema
+from app.pagination import parse_limit
+from app import search
+
+bp = Blueprint('search', __name__)
+
+SEARCH_TYPES = {
+    'products': (Product, products_schema),
+    'clients': (Client, clients_schema),
+}
+MAX_SEARCH_OFFSET = 1000
+
+
+# -------------------- BÚSQUEDA --------------------
+# /api/search?company_id=...&q=...&type=products,clients&limit=20&offset=0
+@bp.route('/api/search', methods=['GET'])
+def search_catalog():
+    company_id = request.args.get('company_id')
+    q = (request.args.get('q') or '').strip()
+    if not company_id:
+        return {"msg": "Falta el parámetro company_id"}, 400
+    if not q:
+        return {"msg": "Falta el parámetro q"}, 400
+
+    types = [t for t in request.args.get('type', 'products,clients').split(',') if t]
+    unknown = [t for t in types if t not in SEARCH_TYPES]
+    if unknown or not types:
+        return {"msg": f"Tipo de búsqueda inválido: {', '.join(unknown) or 'vacío'}"}, 400
+
+    limit = parse_limit(request.args.get('limit'), default=20)
+    try:
+        offset = max(0, min(int(request.args.get('offset', 0)), MAX_SEARCH_OFFSET))
+    except ValueError:
+        offset = 0
+
+    result = {"query": q, "limit": limit}
+    for entity in types:
+        model, schema = SEARCH_TYPES[entity]
+        result[entity] = search.search(entity, model, schema, q, company_id, limit, offset)
+    return jsonify(result), 200
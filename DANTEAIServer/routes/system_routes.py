@@ -0,0 +1,23 @@
+from flask import Blueprint, jsonify, request, current_app, abort
+from app import hashing, cache, db_pool, replicas, metrics
+
+bp = Blueprint('system', __name__)
+
+
+# -------------------- ESTADO DEL SERVIDOR --------------------
+@bp.route('/api/system/stats', methods=['GET'])
+def get_system_stats():
+    return jsonify({
+        "password_hashing": hashing.stats(),
+        "catalog_cache": cache.stats(),
+        "db_pool": db_pool.pool_stats(),
+        "replicas": replicas.stats(),
+    }), 200
+
+# Latencia, consultas SQL, bytes y serialización por ruta (Prometheus)
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        abort(401)
+    return current_app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
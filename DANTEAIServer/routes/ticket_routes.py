@@ -1,12 +1,25 @@
-from index import app,  db
-from flask import  request, jsonify, abort
+from app.extensions import db
+from flask import Blueprint, request, jsonify, abort
 from models.model_ticket import *
 from models.all_schemas import support_ticket_schema, support_tickets_schema
+from app.pagination import list_response
+from models.model_user import User
+from app.signals import notify_change
+from app import listings
 
+bp = Blueprint('ticket', __name__)
+
+
+
+# Los tickets pertenecen a la empresa de su usuario
+def _notify_ticket(ticket, action, user_id=None):
+    user = db.session.get(User, user_id or ticket.user_id)
+    if user is not None:
+        notify_change('ticket', user.company_id, [ticket.id], action)
 
 
 # -------------------- TICKET -------------------
-@app.route('/api/support/tickets', methods=['POST'])
+@bp.route('/api/support/tickets', methods=['POST'])
 def create_ticket():
     data = request.json
     subject = data.get('subject')
@@ -19,23 +32,22 @@ def create_ticket():
     ticket = SupportTicket(subject=subject, description=description, user_id=user_id)
     db.session.add(ticket)
     db.session.commit()
+    _notify_ticket(ticket, 'create')
 
     return support_ticket_schema.jsonify(ticket), 201
 
-@app.route('/api/support/tickets', methods=['GET'])
+@bp.route('/api/support/tickets', methods=['GET'])
 def get_tickets():
-    tickets = SupportTicket.query.order_by(SupportTicket.created_at.desc()).all()
-
-    return support_tickets_schema.jsonify(tickets), 200
+    return list_response(listings.tickets(), support_tickets_schema, SupportTicket.created_at, SupportTicket.id)
 
-@app.route('/api/support/tickets/<ticket_id>', methods=['GET'])
+@bp.route('/api/support/tickets/<ticket_id>', methods=['GET'])
 def get_ticket(ticket_id):
     ticket = SupportTicket.query.get(ticket_id)
     if not ticket:
         abort(404, 'Ticket no encontrado')
     return support_ticket_schema.jsonify(ticket), 200
 
-@app.route('/api/support/tickets/<ticket_id>', methods=['PUT'])
+@bp.route('/api/support/tickets/<ticket_id>', methods=['PUT'])
 def update_ticket(ticket_id):
     ticket = SupportTicket.query.get(ticket_id)
     if not ticket:
@@ -46,14 +58,17 @@ def update_ticket(ticket_id):
     ticket.description = data.get('description', ticket.description)
     ticket.status = data.get('status', ticket.status)
     db.session.commit()
+    _notify_ticket(ticket, 'update')
 
     return support_ticket_schema.jsonify(ticket), 200
 
-@app.route('/api/support/tickets/<ticket_id>', methods=['DELETE'])
+@bp.route('/api/support/tickets/<ticket_id>', methods=['DELETE'])
 def delete_ticket(ticket_id):
     ticket = SupportTicket.query.get(ticket_id)
     if not ticket:
         abort(404, 'Ticket no encontrado')
+    user_id = ticket.user_id
     db.session.delete(ticket)
     db.session.commit()
+    _notify_ticket(ticket, 'delete', user_id)
     return jsonify({'msg': 'Ticket eliminado'}), 200
\ No newline at end of file
@@ -0,0 +1,70 @@
+from app.init import allowed_file
+from flask import Blueprint, request, jsonify
+from app.media import save_stream, UploadTooLarge
+from app.upload_sessions import (
+    UploadSessionError, create_session, session_status, append_chunk, cancel_session
+)
+
+bp = Blueprint('upload', __name__)
+
+
+# -------------------- SUBIDAS --------------------
+# El nombre devuelto se adjunta luego a la entidad con el campo image_ref / avatar_ref.
+
+@bp.app_errorhandler(UploadTooLarge)
+def handle_upload_too_large(e):
+    return jsonify({"message": "Archivo demasiado grande", "max_bytes": e.limit}), 413
+
+
+@bp.app_errorhandler(UploadSessionError)
+def handle_upload_session_error(e):
+    body = {"message": e.message}
+    headers = {}
+    if e.offset is not None:
+        body["offset"] = e.offset
+        headers["Upload-Offset"] = str(e.offset)
+    return jsonify(body), e.status, headers
+
+
+# Subida en streaming: el cuerpo crudo se escribe a disco según llega (sin multipart)
+@bp.route('/api/uploads', methods=['PUT'])
+def upload_stream():
+    filename = request.args.get('filename') or request.headers.get('X-Filename')
+    if not filename or not allowed_file(filename):
+        return jsonify({"message": "Extensión de imagen no permitida"}), 400
+
+    stored = save_stream(request.stream, filename)
+    return jsonify({"filename": stored}), 201
+
+
+# Subidas reanudables por bloques
+@bp.route('/api/uploads/sessions', methods=['POST'])
+def create_upload_session():
+    data = request.get_json() or {}
+    filename = data.get('filename')
+    if not filename or not allowed_file(filename):
+        return jsonify({"message": "Extensión de imagen no permitida"}), 400
+    return jsonify(create_session(filename, data.get('size'))), 201
+
+
+@bp.route('/api/uploads/sessions/<upload_id>', methods=['GET', 'HEAD'])
+def get_upload_session(upload_id):
+    status = session_status(upload_id)
+    return jsonify(status), 200, {"Upload-Offset": str(status["offset"])}
+
+
+@bp.route('/api/uploads/sessions/<upload_id>', methods=['PATCH'])
+def upload_chunk(upload_id):
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({"message": "Cabecera Upload-Offset requerida"}), 400
+
+    result = append_chunk(upload_id, offset, request.stream)
+    status = 201 if 'filename' in result else 200
+    return jsonify(result), status, {"Upload-Offset": str(result["offset"])}
+
+
+@bp.route('/api/uploads/sessions/<upload_id>', methods=['DELETE'])
+def delete_upload_session(upload_id):
+    cancel_session(upload_id)
+    return '', 204
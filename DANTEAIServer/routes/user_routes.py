@@ -1,8 +1,11 @@
 from app.init import allowed_file
-from index import app, db
-from flask import  request, jsonify, abort, send_from_directory
+from app.extensions import db
+from flask import Blueprint, request, jsonify, abort, send_from_directory, current_app
 from models.model_user import *
 from models.model_message import Message
+from app.inbox import forget_user
+from app.hashing import HashingBusy, needs_rehash, note_rehash
+from app.media import save_upload, remove_media, send_media, referenced_upload, wants_webp
 from models.all_schemas import user_schema, users_schema, company_schema
 import os
 import uuid
@@ -10,10 +13,12 @@ from werkzeug.utils import secure_filename
 from flask_jwt_extended import (
    create_access_token
 )
-import mimetypes
 from sqlalchemy import func
+
+bp = Blueprint('user', __name__)
+
 # -------------------- RUTAS USERS --------------------
-@app.route('/api/users/login', methods=['POST'])
+@bp.route('/api/users/login', methods=['POST'])
 def login_user():
     data = request.get_json()
     email = data.get('email')
@@ -24,8 +29,17 @@ def login_user():
 
     user = User.query.filter_by(email=email).first()
 
-    if not user or not user.check_password(password):
-        return jsonify({"message": "Credenciales inválidas"}), 401
+    try:
+        if not user or not user.check_password(password):
+            return jsonify({"message": "Credenciales inválidas"}), 401
+
+        # Rehash transparente si el hash guardado usa parámetros antiguos
+        if needs_rehash(user.password_hash):
+            user.set_password(password)
+            db.session.commit()
+            note_rehash()
+    except HashingBusy:
+        return jsonify({"message": "Servidor ocupado, reintente"}), 503, {"Retry-After": "1"}
 
     # Crear token con id_user
     token = create_access_token(identity=user.id_user)
@@ -43,7 +57,7 @@ def login_user():
         "user": user_data
     }), 200
 
-@app.route('/api/users/<string:id_user>/change-password', methods=['PUT'])
+@bp.route('/api/users/<string:id_user>/change-password', methods=['PUT'])
 def change_password(id_user):
     user = User.query.get(id_user)
     if not user:
@@ -56,10 +70,13 @@ def change_password(id_user):
     if not current_password or not new_password:
         return jsonify({"message": "Faltan campos"}), 400
 
-    if not user.check_password(current_password):
-        return jsonify({"message": "Contraseña actual incorrecta"}), 401
+    try:
+        if not user.check_password(current_password):
+            return jsonify({"message": "Contraseña actual incorrecta"}), 401
 
-    user.set_password(new_password)
+        user.set_password(new_password)
+    except HashingBusy:
+        return jsonify({"message": "Servidor ocupado, reintente"}), 503, {"Retry-After": "1"}
     try:
         db.session.commit()
         return jsonify({"message": "Contraseña actualizada correctamente"}), 200
@@ -68,7 +85,7 @@ def change_password(id_user):
         return jsonify({"message": "Error actualizando contraseña", "error": str(e)}), 500
 
 
-@app.route('/api/users', methods=['GET'])
+@bp.route('/api/users', methods=['GET'])
 def get_users():
     company_id = request.args.get('company_id')
     if not company_id:
@@ -77,13 +94,22 @@ def get_users():
     return users_schema.jsonify(users), 200
 
 
-@app.route('/api/users/<string:user_id>/avatar', methods=['PUT'])
+@bp.route('/api/users/<string:user_id>/avatar', methods=['PUT'])
 def update_avatar(user_id):
     user = User.query.get(user_id)
 
     if not user:
         return jsonify({"msg": "Usuario no encontrado"}), 404
 
+    # Imagen subida antes por /api/uploads (streaming o reanudable)
+    avatar_ref = referenced_upload(request.form.get('avatar_ref') or (request.get_json(silent=True) or {}).get('avatar_ref'))
+    if avatar_ref:
+        if user.avatar_url != avatar_ref:
+            remove_media(user.avatar_url)
+        user.avatar_url = avatar_ref
+        db.session.commit()
+        return user_schema.dump(user), 200
+
     if 'avatar' not in request.files:
         return jsonify({"msg": "No se envió ningún archivo"}), 400
 
@@ -95,35 +121,24 @@ def update_avatar(user_id):
     if not avatar.content_type.startswith('image/'):
         return jsonify({"msg": "El archivo debe ser una imagen"}), 400
 
-    filename = secure_filename(avatar.filename)
-    ext = os.path.splitext(filename)[1]
-    unique_filename = f"{uuid.uuid4().hex}{ext}"
+    filename = save_upload(avatar)
+    if user.avatar_url != filename:
+        remove_media(user.avatar_url)
 
-    upload_dir = os.path.join(app.instance_path, 'uploads', 'avatars')
-    os.makedirs(upload_dir, exist_ok=True)
-
-    if user.avatar_url:
-        old_path = os.path.join(upload_dir, user.avatar_url)
-        if os.path.exists(old_path):
-            os.remove(old_path)
-
-    file_path = os.path.join(upload_dir, unique_filename)
-    avatar.save(file_path)
-
-    user.avatar_url = unique_filename
+    user.avatar_url = filename
     db.session.commit()
 
     return user_schema.dump(user), 200
 
 
-@app.route('/api/users/<id>', methods=['GET'])
+@bp.route('/api/users/<id>', methods=['GET'])
 def get_user(id):
     user = User.query.get(id)
     if not user:
         return jsonify({"message": "Usuario no encontrado"}), 404
     return user_schema.jsonify(user), 200
 
-@app.route('/api/users', methods=['POST'])
+@bp.route('/api/users', methods=['POST'])
 def create_user():
     # Diferenciar si es JSON o multipart/form-data
     if 'application/json' in request.content_type:
@@ -153,15 +168,8 @@ def create_user():
         if 'avatar' in request.files:
             file = request.files['avatar']
             if file and allowed_file(file.filename):
-                filename = secure_filename(f"{uuid.uuid4()}_{file.filename}")
-
-                uploads_folder = os.path.join(app.instance_path, 'uploads', 'avatars')
-                os.makedirs(uploads_folder, exist_ok=True)  # crear carpeta si no existe
-
-                file_path = os.path.join(uploads_folder, filename)
                 try:
-                    file.save(file_path)
-                    avatar_url = filename
+                    avatar_url = save_upload(file)
                 except Exception as e:
                     return jsonify({"message": "Error guardando el avatar", "error": str(e)}), 500
 
@@ -191,10 +199,12 @@ def create_user():
         db.session.commit()
         return user_schema.jsonify(user), 201
 
+    except HashingBusy:
+        return jsonify({"message": "Servidor ocupado, reintente"}), 503, {"Retry-After": "1"}
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Error creando usuario", "error": str(e)}), 500
-@app.route('/api/users/<id>', methods=['PUT'])
+@bp.route('/api/users/<id>', methods=['PUT'])
 def update_user(id):
     user = User.query.get(id)
     if not user:
@@ -262,7 +272,11 @@ def update_user(id):
 
     # --- Contraseña ---
     if 'password' in data and data['password']:
-        user.set_password(data['password'])
+        try:
+            user.set_password(data['password'])
+        except HashingBusy:
+            db.session.rollback()
+            return jsonify({"message": "Servidor ocupado, reintente"}), 503, {"Retry-After": "1"}
         updated = True
 
     # --- Imagen/avatar ---
@@ -270,22 +284,11 @@ def update_user(id):
         avatar = request.files['avatar']
         if avatar and avatar.filename != '':
             if avatar.content_type.startswith('image/'):
-                filename = secure_filename(avatar.filename)
-                ext = os.path.splitext(filename)[1]
-                unique_filename = f"{uuid.uuid4().hex}{ext}"
-
-                upload_dir = os.path.join(app.instance_path, 'uploads', 'avatars')
-                os.makedirs(upload_dir, exist_ok=True)
-
-                # Eliminar antiguo
-                if user.avatar_url:
-                    old_path = os.path.join(upload_dir, user.avatar_url)
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
-
-                # Guardar nuevo
-                avatar.save(os.path.join(upload_dir, unique_filename))
-                user.avatar_url = unique_filename
+                # Guardar nuevo y eliminar antiguo
+                filename = save_upload(avatar)
+                if user.avatar_url != filename:
+                    remove_media(user.avatar_url)
+                user.avatar_url = filename
                 updated = True
             else:
                 return jsonify({"message": "El archivo debe ser una imagen"}), 400
@@ -297,17 +300,18 @@ def update_user(id):
         db.session.commit()
         return user_schema.jsonify(user), 200
     except Exception as e:
-        print(e)
+        current_app.logger.exception("Error actualizando usuario %s", id)
         db.session.rollback()
         return jsonify({"message": "Error actualizando", "error": str(e)}), 500
 
-@app.route('/api/users/<id>', methods=['DELETE'])
+@bp.route('/api/users/<id>', methods=['DELETE'])
 def delete_user(id):
     user = User.query.get(id)
     if not user:
         return jsonify({"message": "Usuario no encontrado"}), 404
     try:
         # Borrar mensajes donde el usuario es receptor o emisor
+        forget_user(id)
         Message.query.filter(
             (Message.receiver_id == id) | (Message.sender_id == id)
         ).delete(synchronize_session=False)
@@ -315,24 +319,11 @@ def delete_user(id):
         db.session.commit()
         return '', 204
     except Exception as e:
-        print(e)
+        current_app.logger.exception("Error eliminando usuario %s", id)
         db.session.rollback()
         return jsonify({"message": "Error eliminando", "error": str(e)}), 500
-@app.route('/api/uploads/avatars/<filename>')
+@bp.route('/api/uploads/avatars/<filename>')
 def uploaded_file(filename):
-    file_path = os.path.join(app.instance_path, 'uploads', 'avatars')
-    print(f"[DEBUG] Ruta del archivo solicitado: {file_path}")
-    
-    if not os.path.exists(file_path):
-        print(f"[ERROR] Archivo no encontrado: {file_path}")
-        abort(404)
-
-    mimetype, _ = mimetypes.guess_type(file_path)
-    print(f"[DEBUG] Mimetype detectado: {mimetype}")
-    
-    if not mimetype:
-        mimetype = 'application/octet-stream'
-        print(f"[WARNING] Mimetype no detectado, se usa fallback: {mimetype}")
-
-    print(f"[INFO] Enviando archivo: {filename} con mimetype: {mimetype}")
-    return send_from_directory(app.config['AVATAR_UPLOAD_FOLDER'], filename, mimetype=mimetype)
+    # ?size=48 -> miniatura; WebP si el cliente lo acepta o se pide ?format=webp
+    size = request.args.get('size', type=int)
+    return send_media(filename, size=size, webp=wants_webp())